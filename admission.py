@@ -0,0 +1,85 @@
+import collections
+import numpy as np
+
+# contador máximo (4 bits) e largura mínima de cada linha do sketch
+COUNTER_MAX = 15
+MIN_WIDTH = 1024
+
+class FrequencySketch:
+    """
+    Count-min compacto (contadores de 4 bits em uint8) com envelhecimento:
+    a cada `sample` registros todos os contadores caem pela metade, então a
+    frequência acompanha o uso recente.
+    """
+    def __init__(self, width:int=4096, depth:int=4, sample:int|None=None):
+        self.width = 1 << (max(MIN_WIDTH, width) - 1).bit_length()
+        self.mask = self.width - 1
+        self.depth = depth
+        self.table = np.zeros((depth, self.width), dtype=np.uint8)
+        self.sample = sample or 10 * self.width
+        self.additions = 0
+
+    def _slots(self, key):
+        h = hash(key)
+        return [hash((h, row)) & self.mask for row in range(self.depth)]
+
+    def increment(self, key):
+        for row, i in enumerate(self._slots(key)):
+            if self.table[row, i] < COUNTER_MAX:
+                self.table[row, i] += 1
+        self.additions += 1
+        if self.additions >= self.sample:
+            self.table >>= 1
+            self.additions //= 2
+
+    def estimate(self, key) -> int:
+        return int(min(self.table[row, i] for row, i in enumerate(self._slots(key))))
+
+class TinyLFU:
+    """
+    Admissão por frequência (TinyLFU, ciente do tamanho): um candidato que
+    precisa despejar outros só entra se for mais usado que todos eles.
+    """
+    def __init__(self, width:int=4096):
+        self.sketch = FrequencySketch(width)
+
+    def record(self, key):
+        self.sketch.increment(key)
+
+    def admit(self, key, victims) -> bool:
+        freq = self.sketch.estimate(key)
+        return all(freq > self.sketch.estimate(v) for v in victims if v != key)
+
+def replay(trace, sizes, max_bytes:int, admission:bool=True, pinned=()):
+    """
+    Reproduz um trace de acessos contra um LRU com orçamento em bytes (com ou
+    sem TinyLFU) e devolve a taxa de acerto. Compara políticas com o mesmo trace.
+    """
+    policy = TinyLFU() if admission else None
+    cache = collections.OrderedDict()
+    used = hits = 0
+    for key in trace:
+        if policy is not None:
+            policy.record(key)
+        if key in cache:
+            cache.move_to_end(key)
+            hits += 1
+            continue
+        size = sizes[key]
+        victims, freed = [], 0
+        for k in cache:
+            if used - freed + size <= max_bytes:
+                break
+            if k in pinned:
+                continue
+            victims.append(k)
+            freed += cache[k]
+        if used - freed + size > max_bytes:
+            continue  # não cabe nem despejando tudo
+        if victims and policy is not None and key not in pinned and not policy.admit(key, victims):
+            continue
+        for k in victims:
+            used -= cache.pop(k)
+        cache[key] = size
+        used += size
+    return hits / len(trace) if trace else 0.0
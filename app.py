@@ -1,13 +1,13 @@
-import sys, os, json, threading, shutil
+import sys, os, json, threading, shutil, multiprocessing
 import resources_rc
 import sounddevice as sd
 from PySide6 import QtCore, QtWidgets, QtGui
-import concurrent.futures
 
 from i18n import Translator, TRANSLATIONS
 from mixer import Mixer
-from audio_cache import AudioCache
-from widgets import SoundItemWidget, SoundCardWidget, CardsPanel, ElidedLabel
+from audio_cache import AudioCache, StreamingClip
+from library_index import LibraryIndex
+from widgets import SoundItemWidget, SoundCardWidget, CardsPanel, ElidedLabel, DEFAULT_PLAY_MODE
 from hotkeys import HotkeyManager
 
 PRESET_FILTER = "Preset do Finoboard (*.finoboard.json);;JSON (*.json);;Todos (*)"
@@ -101,10 +101,23 @@ class SoundboardApp(QtWidgets.QMainWindow):
         super().__init__()
         self.tr=Translator("pt")
         self.mixer=Mixer(samplerate=48000, channels=2, blocksize=256)
-        self.cache=AudioCache(target_samplerate=self.mixer.sr, target_channels=2)
+        # int16 no cache: metade da RAM; o mixer converte dentro do callback.
+        # o aquecimento decodifica em processos (fora do GIL do callback de áudio)
+        procs=max(1, min(4, (os.cpu_count() or 2)-1))
+        # metadados lidos uma vez na importação: duração na UI e custo na fila de aquecimento
+        self.library=LibraryIndex(os.path.join(os.path.dirname(self._pcm_cache_dir()), "library.json"))
+        self.cache=AudioCache(target_samplerate=self.mixer.sr, target_channels=2, disk_dir=self._pcm_cache_dir(),
+                              store_dtype="int16", prefetch_workers=procs, decode_processes=procs,
+                              manifest_path=os.path.join(os.path.dirname(self._pcm_cache_dir()), "warmstart.json"),
+                              library=self.library)
+        # mudanças nas pastas da biblioteca invalidam o cache (o play não faz stat)
+        self.watcher=QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_library_changed)
+        self.watcher.directoryChanged.connect(self._on_library_dir_changed)
         self.gain=1.0; self.monitor_gain=1.0
         self.hk=HotkeyManager()
         self.view_mode="grid"
+        self._pad_opts={}  # path -> (modo de disparo, grupo de corte); refeito em rebuild_hotkeys
 
         self.sig_add_path.connect(self._add_item_from_signal)
         self.sig_status.connect(self._show_status)
@@ -132,6 +145,12 @@ class SoundboardApp(QtWidgets.QMainWindow):
         self.rebuild_hotkeys()
         self.apply_view_mode()
 
+    def _pcm_cache_dir(self) -> str:
+        base = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.CacheLocation)
+        if not base:
+            base = os.path.join(QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.TempLocation), "Finoboard")
+        return os.path.join(base, "pcm")
+
     # ---------- assets / estilos ----------
     def _ensure_check_asset(self) -> str:
         pal = self.palette()
@@ -460,6 +479,10 @@ class SoundboardApp(QtWidgets.QMainWindow):
         root.addLayout(buttons)
 
         self.status=QtWidgets.QStatusBar(); self.setStatusBar(self.status)
+        self.cacheLabel=QtWidgets.QLabel("")
+        self.status.addPermanentWidget(self.cacheLabel)
+        self._cacheStatsTimer=QtCore.QTimer(self); self._cacheStatsTimer.setInterval(2000)
+        self._cacheStatsTimer.timeout.connect(self._update_cache_stats); self._cacheStatsTimer.start()
         self.warnLabel = QtWidgets.QLabel("")
         self.warnLabel.setObjectName("WarnBanner")
         self.warnLabel.setWordWrap(True)
@@ -514,6 +537,8 @@ class SoundboardApp(QtWidgets.QMainWindow):
         if hasattr(self, "volumeLabel"):
             self.volumeLabel.setText(self.tr.t("volume", val=int(self.gain*100)))
         
+        self._update_cache_stats()
+
         for i in range(self.listWidget.count()):
             w=self.listWidget.itemWidget(self.listWidget.item(i))
             if isinstance(w,SoundItemWidget): w._retranslate()
@@ -620,11 +645,14 @@ class SoundboardApp(QtWidgets.QMainWindow):
         for i in range(self.listWidget.count()):
             w=self.listWidget.itemWidget(self.listWidget.item(i))
             if not isinstance(w,SoundItemWidget): continue
-            c=SoundCardWidget(self.tr,w.path,w.display_name,w.hotkey)
+            c=SoundCardWidget(self.tr,w.path,w.display_name,w.hotkey,
+                              waveform=lambda width,p=w.path: self.cache.waveform(p,width),
+                              duration=w.duration,mode=w.mode,choke=w.choke)
             c.playClicked.connect(self.on_play_path)
             c.removeClicked.connect(lambda w=w: self._remove_by_widget(w))
             c.renameClicked.connect(lambda new,w=w: self._rename_by_widget(w,new))
             c.hotkeyChanged.connect(lambda hk,w=w: self._hotkey_changed_by_widget(w,hk))
+            c.padChanged.connect(lambda mode,choke,w=w: self._pad_changed_by_widget(w,mode,choke))
             cards.append(c)
         self.cardsPanel.set_cards(cards)
         restore()
@@ -644,12 +672,17 @@ class SoundboardApp(QtWidgets.QMainWindow):
         for i in range(self.listWidget.count()):
             if self.listWidget.itemWidget(self.listWidget.item(i)) is w:
                 self.listWidget.takeItem(i); break
+        self._release_cached(w.path)
         self.rebuild_hotkeys(); self.rebuild_cards(); restore()
 
     def _rename_by_widget(self,w:SoundItemWidget,newname:str):
         restore = self._save_restore_scroll()
         w.display_name=newname; self.rebuild_cards(); restore()
 
+    def _pad_changed_by_widget(self,w:SoundItemWidget,mode:str,choke):
+        w.set_pad(mode,choke)
+        self._pad_opts[w.path]=(mode,choke)
+
     def _hotkey_changed_by_widget(self,w:SoundItemWidget,new_hk:str):
         conflict = self.find_hotkey_conflict(new_hk, w)
         if conflict:
@@ -670,37 +703,44 @@ class SoundboardApp(QtWidgets.QMainWindow):
         return paths
 
     def _start_cache_warmup(self):
-        # 2 workers evita CPU/IO exagerados e mantém UI fluida
+        # a fila do cache decodifica em poucos processos: evita CPU/IO exagerados e
+        # mantém UI/áudio fluidos; tocar um clipe ainda na fila passa ele na frente
         paths = self._iter_audio_paths()
         if not paths: return
-        self._warmup_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
-        for p in paths:
-            self._warmup_pool.submit(self._safe_cache_load, p)
-
-    def _safe_cache_load(self, path: str):
-        try:
-            self.cache.load(path)  # usa o cache em memória existente
-        except Exception:
-            pass
+        self.cache.prefetch(paths)
 
     # --- Lista (fonte de verdade) ---
-    def add_item(self, path, display_name=None, hotkey:str|None=None):
+    def add_item(self, path, display_name=None, hotkey:str|None=None, mode:str|None=None, choke:int|None=None):
         item=QtWidgets.QListWidgetItem()
-        widget=SoundItemWidget(self.tr,path,display_name=display_name,hotkey=hotkey)
+        widget=SoundItemWidget(self.tr,path,display_name=display_name,hotkey=hotkey,
+                               duration=self.library.duration(path),
+                               mode=mode or DEFAULT_PLAY_MODE,choke=choke)
         item.setSizeHint(QtCore.QSize(0, self.ROW_HEIGHT))
         self.listWidget.addItem(item); self.listWidget.setItemWidget(item,widget)
         widget.playClicked.connect(self.on_play_path)
         widget.removeClicked.connect(lambda it=item: self.remove_item(it))
         widget.renameClicked.connect(lambda _new,it=item: self.on_item_renamed(it,_new))
         widget.hotkeyChanged.connect(lambda _hk,it=item: self.on_item_hotkey_changed(it))
+        widget.padChanged.connect(lambda _m,_c,it=item: self.on_item_pad_changed(it))
 
     @QtCore.Slot(str)
     def _add_item_from_signal(self,path:str): self.add_item(path)
 
+    def _refresh_durations(self):
+        for i in range(self.listWidget.count()):
+            w=self.listWidget.itemWidget(self.listWidget.item(i))
+            if isinstance(w,SoundItemWidget) and w.duration is None:
+                w.set_duration(self.library.duration(w.path))
+
     def on_item_renamed(self,item,newname):
         w=self.listWidget.itemWidget(item); w.display_name=newname
         self.rebuild_cards()
 
+    def on_item_pad_changed(self,item):
+        w=self.listWidget.itemWidget(item)
+        self._pad_opts[w.path]=(w.mode,w.choke)
+        self.rebuild_cards()
+
     def on_item_hotkey_changed(self,item):
         w=self.listWidget.itemWidget(item)
         conflict = self.find_hotkey_conflict(w.hotkey, w)
@@ -715,8 +755,16 @@ class SoundboardApp(QtWidgets.QMainWindow):
 
     def remove_item(self,item):
         restore = self._save_restore_scroll()
+        w=self.listWidget.itemWidget(item); path=w.path if w else None
         row=self.listWidget.row(item); self.listWidget.takeItem(row)
+        self._release_cached(path)
         self.rebuild_hotkeys(); self.rebuild_cards(); restore()
+
+    def _release_cached(self, path):
+        # o buffer é compartilhado entre cópias do mesmo áudio: só sai sem referências
+        if path and path not in self._iter_audio_paths():
+            self.cache.forget([path])
+            self.library.forget([path])
     
     # --- Adicionar arquivos ---
     def on_add_dialog(self):
@@ -773,16 +821,26 @@ class SoundboardApp(QtWidgets.QMainWindow):
         self.sig_progress_value.connect(self._progress_add.setValue)
         self.sig_progress_close.connect(self._progress_add.close)
 
+        dlg = self._progress_add
         def worker():
             n = 0
             try:
                 for p in flat_unique:
-                    if self._progress_add.wasCanceled():
+                    if dlg.wasCanceled():
                         break
                     self.sig_add_path.emit(p)
                     n += 1
                     self.sig_progress_text.emit(self.tr.t("added_n", n=n, total=total))
                     self.sig_progress_value.emit(n)
+                # uma passada só de cabeçalhos (sem decodificar) para o índice da biblioteca
+                todo = self.library.missing(flat_unique[:n])
+                probed = [0]
+                def on_probed(_path, _entry):
+                    probed[0] += 1
+                    self.sig_progress_text.emit(self.tr.t("probed_n", n=probed[0], total=len(todo)))
+                    self.sig_progress_value.emit(total * probed[0] // len(todo))
+                if todo and not dlg.wasCanceled():
+                    self.library.probe_many(todo, cancelled=dlg.wasCanceled, on_probed=on_probed)
             finally:
                 self.sig_progress_close.emit()
                 self.sig_bulk_done.emit()
@@ -792,6 +850,7 @@ class SoundboardApp(QtWidgets.QMainWindow):
 
     @QtCore.Slot()
     def after_bulk_add(self):
+        self._refresh_durations()
         self.rebuild_hotkeys(); self.rebuild_cards()
         self._start_cache_warmup()
 
@@ -805,7 +864,7 @@ class SoundboardApp(QtWidgets.QMainWindow):
         entries=[]
         for i in range(self.listWidget.count()):
             w=self.listWidget.itemWidget(self.listWidget.item(i))
-            entries.append({"path":w.path,"name":w.display_name,"hotkey":w.hotkey})
+            entries.append({"path":w.path,"name":w.display_name,"hotkey":w.hotkey,"mode":w.mode,"choke":w.choke})
         return entries
 
     def on_play_path(self,path):
@@ -813,13 +872,20 @@ class SoundboardApp(QtWidgets.QMainWindow):
             self.status.showMessage(self.tr.t("cant_output"), 4000); return
         def decode_and_play():
             try:
-                data,sr=self.cache.load(path)
+                # cache miss devolve um StreamingClip: toca enquanto decodifica
+                data,sr=self.cache.open_stream(path)
                 if sr != self.mixer.sr:
                     self.cache.set_target(self.mixer.sr, 2)
-                    data,sr=self.cache.load(path)
-                self.mixer.stop_all()
-                self.mixer.play_clip(data, sr)
+                    data,sr=self.cache.open_stream(path,count_play=False)  # o play já foi contado
+                # polifônico: o modo do pad e o grupo de corte decidem o que para
+                mode,choke=self._pad_opts.get(path,(DEFAULT_PLAY_MODE,None))
+                # ganho de normalização (loudness analisada no decode; 1.0 na primeira vez)
+                if not self.mixer.play_clip(data, sr, gain=self.cache.normalization_gain(path),
+                                            pad=path, mode=mode, choke=choke):
+                    return  # "ignorar enquanto toca"
                 self.sig_status.emit(self.tr.t("playing",name=os.path.basename(path)),2000)
+                if isinstance(data, StreamingClip):
+                    data.result()  # propaga erro de decodificação para o status
             except Exception as e:
                 self.sig_status.emit(self.tr.t("play_error",path=os.path.basename(path),err=e),6000)
         threading.Thread(target=decode_and_play,daemon=True).start()
@@ -899,7 +965,7 @@ class SoundboardApp(QtWidgets.QMainWindow):
             for it in items:
                 p=it.get("path"); n=it.get("name") or (os.path.basename(p) if p else "")
                 hk=(it.get("hotkey") or "")
-                if p and os.path.exists(p): self.add_item(p,display_name=n,hotkey=hk)
+                if p and os.path.exists(p): self.add_item(p,display_name=n,hotkey=hk,mode=it.get("mode"),choke=it.get("choke"))
                 else: missing.append(n or p or "(sem nome)")
             if missing:
                 QtWidgets.QMessageBox.warning(self,self.tr.t("missing_files_title"),
@@ -945,24 +1011,64 @@ class SoundboardApp(QtWidgets.QMainWindow):
                                           self.tr.t("conflict_msg",keys="\n- ".join(keys)))
         def error_cb(err):
             QtWidgets.QMessageBox.critical(self,"Hotkeys", self.tr.t("hotkeys_error",err=err))
-        self.hk.rebuild(self.current_entries(), self.play_by_index, conflict_cb=conflicts_cb, error_cb=error_cb)
+        entries=self.current_entries()
+        self._pad_opts={e["path"]:(e["mode"],e["choke"]) for e in entries}
+        self.hk.rebuild(entries, self.play_by_index, conflict_cb=conflicts_cb, error_cb=error_cb)
+        # clipes com hotkey nunca saem do cache
+        self.cache.set_pinned(self.hk.bound_paths)
+        self._rewatch_library()
+
+    def _rewatch_library(self):
+        paths=set(self._iter_audio_paths())
+        want=paths|{os.path.dirname(p) for p in paths}
+        have=set(self.watcher.files())|set(self.watcher.directories())
+        stale=list(have-want); new=[p for p in want-have if os.path.exists(p)]
+        if stale: self.watcher.removePaths(stale)
+        if new: self.watcher.addPaths(new)
+        self.cache.set_watched(paths & set(self.watcher.files()))
+
+    @QtCore.Slot(str)
+    def _on_library_changed(self,path:str):
+        self.cache.invalidate([path])
+        self._rewatch_library()  # salvar via rename tira o arquivo do watcher: readiciona
+
+    @QtCore.Slot(str)
+    def _on_library_dir_changed(self,directory:str):
+        self.cache.invalidate_dir(directory)
+        self._rewatch_library()
 
     # --- Util ---
     @QtCore.Slot(str,int)
     def _show_status(self,msg:str,timeout:int): self.status.showMessage(msg,timeout)
+    def _update_cache_stats(self):
+        snap=self.cache.stats_snapshot(); c=snap["counters"]
+        hits=c.get("hits",0); disk=c.get("disk_hits",0)+c.get("disk_master_hits",0)
+        total=hits+disk+c.get("misses",0)+c.get("derives",0)+c.get("inflight_joins",0)
+        rate=round(100*(hits+disk)/total) if total else 0
+        self.cacheLabel.setText(self.tr.t("cache_stats",mb=snap["bytes"]//(1024*1024),rate=rate))
+        self.cardsPanel.refresh_waveforms()  # clipes analisados desde o último tick
+        first=snap["phases"].get("first_frames",{})
+        self.cacheLabel.setToolTip(self.tr.t("cache_stats_tip",hits=hits,disk=disk,misses=c.get("misses",0),
+            evictions=c.get("evictions",0),p50=round(first.get("p50_ms",0)),p95=round(first.get("p95_ms",0))))
     def on_clear(self):
         self.on_stop_all(); self.listWidget.clear()
+        self.cache.cancel_prefetch()
         self.rebuild_hotkeys(); self.rebuild_cards()
     def closeEvent(self,event:QtGui.QCloseEvent):
         try:self.hk.stop()
-        finally:self.mixer.stop()
+        finally:
+            self.mixer.stop()
+            self.cache.close()
         return super().closeEvent(event)
 
 def main():
     app=QtWidgets.QApplication(sys.argv)
     app.setWindowIcon(QtGui.QIcon(":/icons/finoboard.ico"))
     win=SoundboardApp(); win.show()
+    # depois que a janela aparece: aquece os clipes mais tocados nas últimas sessões
+    QtCore.QTimer.singleShot(0, win.cache.warm_start)
     sys.exit(app.exec())
 
 if __name__=="__main__":
+    multiprocessing.freeze_support()  # workers do pool de decodificação no .exe
     main()
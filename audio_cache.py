@@ -1,54 +1,1112 @@
-import os, threading, shutil, subprocess
+import os, threading, collections, heapq, itertools, hashlib, multiprocessing, json, time, base64, queue
+import concurrent.futures
 import numpy as np
-from pydub import AudioSegment
-from json import JSONDecodeError
+from disk_cache import DiskPCMCache
+from resampler import make_resampler, QUALITY_HIGH
+from decoders import open_decoder
+from cache_stats import CacheStats
+from pcm_codec import compress_pcm, decompress_pcm
+from admission import TinyLFU
+
+# teto padrão de RAM para os clipes decodificados
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# escala de int16 para float (o mixer converte dentro do callback)
+INT16_SCALE = 1.0 / 32768.0
+LOSSLESS_EXTS = (".wav", ".flac", ".aif", ".aiff")
+# prioridades da fila de aquecimento (menor = antes)
+PRIO_PLAY = 0
+PRIO_RETARGET = 5
+PRIO_WARMSTART = 8
+PRIO_WARMUP = 10
+# chave do master: rate nativo, no lugar do samplerate de destino
+NATIVE = 0
+# bloco usado ao derivar variantes a partir do master
+DERIVE_BLOCK = 65536
+# impressão digital do conteúdo: tamanho + início/fim + blocos espaçados
+FP_EDGE = 64 * 1024
+FP_SAMPLES = 16
+FP_BLOCK = 4096
+# silêncio nas bordas: abaixo de -60 dBFS não conta como áudio
+TRIM_THRESHOLD = 10 ** (-60 / 20)
+TRIM_SCAN_BLOCK = 4096
+# normalização: alvo (dB, escala LUFS) e limites do ganho por voz
+NORM_TARGET_DB = -16.0
+NORM_MAX_BOOST_DB = 12.0
+NORM_MAX_CUT_DB = 24.0
+LOUDNESS_CHUNK = 64     # sub-blocos de 100 ms por passada (limita a memória temporária)
+# camada comprimida (RAM): clipes despejados do PCM que ainda valem a pena
+COMPRESS_MAX_CLIP_BYTES = 64 * 1024 * 1024   # trilhas longas ficam só no disco
+# forma de onda: nível mais fino da pirâmide min/max (vai em float16 no .json)
+WAVE_BINS = 2048
+WAVE_CHUNK_BINS = 256
+# reserva do StreamingClip acima disso (fração de `ready`) é recortada para o tamanho exato
+COMPACT_SLACK = 1 / 8
+# manifesto de partida quente: clipes mais tocados (contagem com meia-vida)
+MANIFEST_MAX = 256
+MANIFEST_HALF_LIFE = 7 * 24 * 3600
+MANIFEST_SAVE_EVERY = 16
+WARMSTART_TOP_N = 32
+WARMSTART_IO_BYTES = 256 * 1024 * 1024
+
+# stat "de memória" (mtime, tamanho) para paths vigiados por um watcher
+_Stat = collections.namedtuple("_Stat", "st_mtime st_size")
+
+def sample_scale(dtype) -> float:
+    """Fator que leva as amostras armazenadas para float em [-1, 1]."""
+    return INT16_SCALE if np.dtype(dtype) == np.int16 else 1.0
+
+def to_storage(block:np.ndarray, dtype) -> np.ndarray:
+    """Converte frames float32 decodificados para o dtype de armazenamento."""
+    if np.dtype(dtype) == np.int16:
+        return np.clip(np.rint(block * 32768.0), -32768, 32767).astype(np.int16)
+    return block
+
+def _loud(x:np.ndarray, t:float) -> np.ndarray:
+    # sem abs(): -32768 estoura em int16
+    return ((x > t) | (x < -t)).any(axis=1)
+
+def audible_bounds(samples:np.ndarray, threshold:float=TRIM_THRESHOLD):
+    """
+    (primeiro, último + 1) frame acima do limiar; (0, 0) se tudo for silêncio.
+    Varre só as bordas, em blocos: o custo é proporcional ao silêncio.
+    """
+    t = threshold / sample_scale(samples.dtype)
+    n = samples.shape[0]
+    for i in range(0, n, TRIM_SCAN_BLOCK):
+        hit = np.flatnonzero(_loud(samples[i:i + TRIM_SCAN_BLOCK], t))
+        if hit.size:
+            start = i + int(hit[0])
+            break
+    else:
+        return 0, 0
+    for j in range(n, start, -TRIM_SCAN_BLOCK):
+        i = max(start, j - TRIM_SCAN_BLOCK)
+        hit = np.flatnonzero(_loud(samples[i:j], t))
+        if hit.size:
+            return start, i + int(hit[-1]) + 1
+    return start, start + 1
+
+def analyze_loudness(samples:np.ndarray, sr:int):
+    """
+    (loudness, pico): loudness em dB na escala LUFS (blocos de 400 ms com 75% de
+    sobreposição e gates absoluto/relativo da BS.1770, sem o filtro K) e pico
+    em [0, 1]. loudness é None para um clipe só com silêncio.
+    """
+    scale = np.float32(sample_scale(samples.dtype))
+    step = max(1, sr // 10)  # sub-bloco de 100 ms
+    n = samples.shape[0] // step
+    sub = np.empty(n, dtype=np.float64)
+    peak = 0.0
+    chunk = step * LOUDNESS_CHUNK
+    for i in range(0, samples.shape[0], chunk):
+        blk = samples[i:i + chunk]
+        if blk.size:
+            peak = max(peak, max(float(blk.max()), -float(blk.min())) * float(scale))
+        m = min(blk.shape[0], (n - i // step) * step)
+        if m > 0:
+            x = blk[:m].astype(np.float32)
+            if scale != 1.0:
+                x *= scale
+            sub[i // step:i // step + m // step] = np.einsum("ij,ij->i", x, x).reshape(-1, step).mean(axis=1)
+    if n >= 4:
+        power = (sub[:-3] + sub[1:-2] + sub[2:-1] + sub[3:]) * 0.25
+    else:
+        power = sub[:1] if n else np.zeros(0)
+    with np.errstate(divide="ignore"):
+        lufs = -0.691 + 10.0 * np.log10(power)
+    gated = power[lufs > -70.0]
+    if not gated.size:
+        return None, peak
+    rel = -0.691 + 10.0 * np.log10(gated.mean()) - 10.0
+    gated = power[lufs > max(-70.0, rel)]
+    return float(-0.691 + 10.0 * np.log10(gated.mean())), peak
+
+def _halve_peaks(level:np.ndarray) -> np.ndarray:
+    starts = np.arange(0, level.shape[0], 2)
+    out = np.empty((starts.shape[0], 2), dtype=np.float32)
+    out[:, 0] = np.minimum.reduceat(level[:, 0], starts)
+    out[:, 1] = np.maximum.reduceat(level[:, 1], starts)
+    return out
+
+def wave_levels(base:np.ndarray):
+    """Pirâmide a partir do nível mais fino: cada nível tem metade dos bins do anterior."""
+    levels = [base.astype(np.float32)]
+    while levels[-1].shape[0] > 1:
+        levels.append(_halve_peaks(levels[-1]))
+    return levels
+
+def peak_pyramid(samples:np.ndarray):
+    """
+    Pirâmide min/max (todos os canais juntos) em uma passada vetorizada:
+    até WAVE_BINS bins no nível 0, valores em [-1, 1].
+    """
+    n = samples.shape[0]
+    if n == 0:
+        return [np.zeros((0, 2), dtype=np.float32)]
+    size = -(-n // min(WAVE_BINS, n))   # frames por bin
+    base = np.empty((-(-n // size), 2), dtype=np.float32)
+    chunk = size * WAVE_CHUNK_BINS
+    for i in range(0, n, chunk):
+        blk = samples[i:i + chunk]
+        starts = np.arange(0, blk.shape[0], size)
+        b = i // size
+        # min/max entre canais coluna a coluna (reduzir axis=1 com 2 canais é lento)
+        lo = blk[:, 0].copy(); hi = lo.copy()
+        for c in range(1, blk.shape[1]):
+            np.minimum(lo, blk[:, c], out=lo)
+            np.maximum(hi, blk[:, c], out=hi)
+        base[b:b + starts.shape[0], 0] = np.minimum.reduceat(lo, starts)
+        base[b:b + starts.shape[0], 1] = np.maximum.reduceat(hi, starts)
+    base *= np.float32(sample_scale(samples.dtype))
+    return wave_levels(base)
+
+def peaks_for_width(levels, width:int) -> np.ndarray:
+    """Colunas [width, 2] (min, max) a partir do menor nível que basta: O(width)."""
+    level = next((l for l in reversed(levels) if l.shape[0] >= width), levels[0])
+    if level.shape[0] == 0:
+        return np.zeros((width, 2), dtype=np.float32)
+    if level.shape[0] <= width:
+        return level[np.arange(width) * level.shape[0] // width]  # menos bins que colunas: repete
+    starts = np.arange(width) * level.shape[0] // width
+    out = np.empty((width, 2), dtype=np.float32)
+    out[:, 0] = np.minimum.reduceat(level[:, 0], starts)
+    out[:, 1] = np.maximum.reduceat(level[:, 1], starts)
+    return out
+
+def content_fingerprint(path, size:int) -> str:
+    """
+    Hash barato do arquivo (tamanho + blocos amostrados). Cópias do mesmo som em
+    pastas diferentes caem no mesmo buffer decodificado.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        if size <= 2 * FP_EDGE + FP_SAMPLES * FP_BLOCK:
+            h.update(f.read())
+        else:
+            h.update(f.read(FP_EDGE))
+            step = (size - 2 * FP_EDGE) // (FP_SAMPLES + 1)
+            for i in range(1, FP_SAMPLES + 1):
+                f.seek(FP_EDGE + i * step)
+                h.update(f.read(FP_BLOCK))
+            f.seek(size - FP_EDGE)
+            h.update(f.read(FP_EDGE))
+    return h.hexdigest()
+
+_POOL_CACHE = None  # AudioCache do processo worker (um por processo)
+
+def _pool_decode(disk_root, path, sr, ch, dtype, quality):
+    """
+    Roda num processo do pool: decodifica e grava master/variante no cache em
+    disco. O pai só abre o .npy via memmap (sem copiar pelo pipe).
+    """
+    global _POOL_CACHE
+    c = _POOL_CACHE
+    if c is None or c.disk is None or c.disk.root != disk_root:
+        # max_bytes=0: nada fica na RAM do worker, só no disco
+        c = _POOL_CACHE = AudioCache(sr, ch, max_bytes=0, disk_dir=disk_root, prefetch_workers=0,
+                                     store_dtype=dtype, resample_quality=quality)
+    c.sr, c.ch = sr, ch
+    try:
+        c.load(path)
+    finally:
+        c.forget([path])
+
+class StreamingClip:
+    """
+    Buffer que cresce enquanto o decoder escreve. O mixer lê até `ready`
+    sem esperar o EOF; `done` indica que não virão mais frames.
+    Com trim, `start` (primeiro frame audível) fica None até ser conhecido e
+    `end` (fim do áudio, sem o silêncio final) só vale depois de `done`.
+    Ordem de leitura para o consumidor: done -> start/end -> ready -> data.
+    """
+    def __init__(self, sr:int, ch:int, capacity:int, dtype=np.float32, trim_threshold:float|None=None):
+        self.sr = sr
+        self.ch = ch
+        self.dtype = np.dtype(dtype)
+        self.scale = sample_scale(self.dtype)
+        # np.empty só reserva: páginas não tocadas não ocupam RAM
+        self.data = np.empty((max(1, capacity), ch), dtype=self.dtype)
+        self.ready = 0
+        self.trim_threshold = trim_threshold
+        self.start = None if trim_threshold else 0
+        self.end = None
+        self.done = False
+        self.error = None
+        self._event = threading.Event()
+
+    def write(self, block:np.ndarray):
+        n = block.shape[0]
+        end = self.ready + n
+        if end > self.data.shape[0]:
+            grown = np.empty((max(end, self.data.shape[0] * 2), self.ch), dtype=self.dtype)
+            grown[:self.ready] = self.data[:self.ready]
+            self.data = grown  # publica o buffer novo antes de avançar `ready`
+        self.data[self.ready:end] = to_storage(block, self.dtype)
+        if self.start is None:
+            hit = np.flatnonzero(_loud(block, self.trim_threshold))
+            if hit.size:
+                self.start = self.ready + int(hit[0])  # publicado antes de `ready`
+        self.ready = end
+
+    def compact(self) -> np.ndarray:
+        """
+        Frames escritos; copia para um array do tamanho exato se a reserva sobrou
+        muito (no Windows o np.empty inteiro conta no commit, não só a view).
+        """
+        if self.data.shape[0] - self.ready > self.ready * COMPACT_SLACK:
+            self.data = self.data[:self.ready].copy()  # mesmo conteúdo: o mixer pode trocar no meio
+        return self.data[:self.ready]
+
+    def finish(self, error:BaseException|None=None):
+        if self.trim_threshold and self.start is not None:
+            self.end = audible_bounds(self.data[self.start:self.ready], self.trim_threshold)[1] + self.start
+        else:
+            self.end = self.ready
+        if self.start is None:
+            self.start = self.end = 0  # só silêncio
+        self.error = error
+        self.done = True
+        self._event.set()
+
+    def resolve(self, samples:np.ndarray):
+        """Conclui com um buffer já pronto (ex.: veio do cache em disco)."""
+        self.data = samples
+        if self.trim_threshold:
+            self.start, self.end = audible_bounds(samples, self.trim_threshold)
+        self.ready = samples.shape[0]
+        self.error = None
+        if self.end is None:
+            self.end = self.ready
+        self.done = True
+        self._event.set()
+
+    def result(self, timeout=None):
+        """Espera o fim da decodificação e devolve os frames audíveis (view, sem cópia)."""
+        if not self._event.wait(timeout):
+            raise TimeoutError("decodificação ainda em andamento")
+        if self.error is not None:
+            raise self.error
+        return self.data[self.start:self.end]
 
 class AudioCache:
-    def __init__(self, target_samplerate=48000, target_channels=2):
+    def __init__(self, target_samplerate=48000, target_channels=2, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None,
+                 prefetch_workers=2, store_dtype=np.float32, resample_quality=QUALITY_HIGH, decode_processes=0,
+                 manifest_path=None, trim_threshold:float|None=TRIM_THRESHOLD, norm_target:float|None=NORM_TARGET_DB,
+                 compressed_max_bytes=None, admission:bool=True, library=None):
         self.sr = target_samplerate
         self.ch = target_channels
-        self.cache = {}
+        self.resample_quality = resample_quality  # variantes ficam no cache: vale a qualidade alta
+        # float32 (padrão) ou int16: metade da RAM, o mixer escala no callback
+        self.store_dtype = np.dtype(store_dtype)
+        if self.store_dtype not in (np.float32, np.int16):
+            raise ValueError(f"dtype de armazenamento não suportado: {self.store_dtype}")
+        # ordem LRU: o acesso mais recente fica no fim; a chave é do conteúdo,
+        # (fingerprint, sr, ch), então paths com o mesmo áudio dividem o buffer
+        self.cache = collections.OrderedDict()  # key -> (samples, sr)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._fp_keys = {}      # fingerprint -> keys em cache (master + variantes)
+        self._aliases = {}      # fingerprint -> paths que apontam para ele (refcount)
+        self._path_fp = {}      # path -> (mtime, size, fingerprint)
+        # paths vigiados por um watcher de arquivos: o memo vale sem stat() até invalidate()
+        self._watched = set()
+        self._trusted = set()
+        self._watch_gen = 0
+        self.pinned = set()     # paths com hotkey: nunca são despejados
+        self.disk = None
+        if disk_dir:
+            try:
+                self.disk = DiskPCMCache(disk_dir)
+            except OSError:
+                self.disk = None  # sem disco gravável: fica só a RAM
         self.lock = threading.Lock()
+        self._inflight = {}     # key -> StreamingClip em decodificação (single-flight)
+        # fila de aquecimento: heap de [prioridade, seq, path, válido]
+        self.prefetch_workers = prefetch_workers
+        self._queue = []
+        self._queued = {}
+        self._queue_seq = itertools.count()
+        self._queue_cv = threading.Condition(self.lock)
+        self._workers = []
+        # aquecimento em processos (fora do GIL do mixer); exige o cache em disco
+        self.decode_processes = decode_processes if self.disk is not None else 0
+        self._pool = None
+        # path -> [plays, último play (epoch)]; persiste entre execuções
+        self.manifest_path = manifest_path
+        self._manifest = self._read_manifest()
+        self._plays_unsaved = 0
+        self._manifest_saving = False  # gravação em segundo plano em andamento
+        self.stats = CacheStats()
+        # corte do silêncio das bordas (None desliga); o buffer guardado é o inteiro
+        self.trim_threshold = trim_threshold
+        self._bounds = {}       # key -> (início, fim) audíveis
+        # loudness por conteúdo (vai no .json do disco); None em norm_target desliga
+        self.norm_target = norm_target
+        self._loudness = {}     # fingerprint -> (loudness dB | None, pico)
+        self._peaks = {}        # fingerprint -> pirâmide min/max (forma de onda)
+        # camada intermediária: PCM int16 comprimido (delta + zlib), LRU própria;
+        # o PCM despejado desce para cá em segundo plano e sobe de novo no play
+        if compressed_max_bytes is None:
+            compressed_max_bytes = max_bytes // 4
+        self.compressed_max_bytes = compressed_max_bytes if self.store_dtype == np.int16 else 0
+        self.ctier = collections.OrderedDict()  # key -> (CompressedPCM, sr)
+        self.cbytes = 0
+        self._demote_q = queue.SimpleQueue()
+        self._demoter = None
+        # admissão por frequência de play: um clipe que precisa despejar outros
+        # só entra na RAM se for mais tocado que eles (None = LRU puro)
+        self.admission = TinyLFU() if admission else None
+        # índice da biblioteca (LibraryIndex, opcional): duração exata e custo de decodificar
+        self.library = library
 
     def set_target(self, samplerate:int, channels:int=2):
+        """
+        Troca o rate/canais de destino sem esvaziar o cache: as variantes antigas
+        continuam valendo (voltar ao device anterior é instantâneo) e as novas
+        são derivadas dos masters em segundo plano.
+        """
         with self.lock:
-            if self.sr != samplerate or self.ch != channels:
-                self.sr = samplerate
-                self.ch = channels
-                self.cache.clear()
+            if self.sr == samplerate and self.ch == channels:
+                return
+            self.sr = samplerate
+            self.ch = channels
+            paths = [next(iter(self._aliases[fp])) for fp in self._fp_keys if self._aliases.get(fp)]
+        self.prefetch(paths, PRIO_RETARGET)
 
-    def _ffmpeg_paths(self):
-        ffm = getattr(AudioSegment, "converter", None) or shutil.which("ffmpeg") or shutil.which("ffmpeg.exe")
-        ffp = getattr(AudioSegment, "ffprobe", None) or shutil.which("ffprobe") or shutil.which("ffprobe.exe")
-        return ffm, ffp
+    def set_budget(self, max_bytes:int):
+        with self.lock:
+            self.max_bytes = max(0, int(max_bytes))
+            self._evict_locked()
+
+    def set_pinned(self, paths):
+        """Clipes fixados (ex.: com hotkey) ficam fora da política LRU."""
+        with self.lock:
+            self.pinned = set(p for p in paths if p)
+            self._evict_locked()
+
+    def _drop_locked(self, key):
+        samples, _sr = self.cache.pop(key)
+        self._bounds.pop(key, None)
+        self.bytes -= samples.nbytes
+        keys = self._fp_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._fp_keys[key[0]]
+
+    def _evict_locked(self):
+        if self.bytes <= self.max_bytes:
+            return
+        for key in list(self.cache):
+            if self.bytes <= self.max_bytes:
+                break
+            if not self.pinned.isdisjoint(self._aliases.get(key[0], ())):
+                continue
+            samples, sr = self.cache[key]
+            self.stats.incr("evictions")
+            self.stats.incr("evicted_bytes", samples.nbytes)
+            self._drop_locked(key)
+            if self.compressed_max_bytes > 0:
+                self._demote_locked(key, samples, sr)
 
     def load(self, path):
-        mtime = os.path.getmtime(path)
-        key = (path, mtime, self.sr, self.ch)
+        """Decodifica (ou reaproveita) o clipe inteiro: devolve (samples, sr)."""
+        return self._acquire(path, stream=False)
+
+    def open_stream(self, path, count_play:bool=True):
+        """
+        Como load(), mas num cache miss devolve (StreamingClip, sr) na hora:
+        a decodificação segue numa thread e o mixer toca o que já chegou.
+        `count_play=False`: mesmo play pedido de novo (ex.: após trocar o rate), não conta outra vez.
+        """
+        entry = self._acquire(path, stream=True, play=count_play)
+        if count_play:
+            self._note_play(path)  # depois do acquire: nada de manifesto antes do clipe sair
+        return entry
+
+    def forget(self, paths):
+        """
+        Solta as referências destes paths; o buffer de um conteúdo só é liberado
+        quando nenhum path aponta mais para ele.
+        """
         with self.lock:
-            if key in self.cache:
-                return self.cache[key]
-
-        try:
-            # caminho normal (usa ffprobe para metadados)
-            seg = AudioSegment.from_file(path).set_frame_rate(self.sr).set_channels(self.ch).set_sample_width(2)
-        except JSONDecodeError as jde:
-            # saída do ffprobe não era JSON -> explicar melhor
-            ffm, ffp = self._ffmpeg_paths()
-            hint = []
-            if not ffp:
-                hint.append("ffprobe não encontrado no PATH.")
-            if not ffm:
-                hint.append("ffmpeg não encontrado no PATH.")
-            raise RuntimeError(
-                "Falha ao analisar o arquivo de áudio (ffprobe retornou saída inválida). "
-                + (" ".join(hint) if hint else "Verifique a instalação do FFmpeg/ffprobe.")
-            ) from jde
-        except Exception as e:
-            # outras falhas (arquivo corrompido / formato não suportado)
+            for p in paths:
+                self._unlink_locked(p)
+
+    def set_watched(self, paths):
+        """
+        Paths cobertos por um watcher (ex.: QFileSystemWatcher). Depois do
+        primeiro acesso, o hit desses paths é só memória: nada de stat().
+        """
+        with self.lock:
+            self._watched = set(p for p in paths if p)
+            self._trusted &= self._watched
+
+    def invalidate(self, paths):
+        """O watcher viu mudança: o próximo acesso volta a conferir stat/fingerprint."""
+        with self.lock:
+            self._watch_gen += 1
+            self._trusted.difference_update(paths)
+
+    def invalidate_dir(self, directory):
+        d = os.path.normcase(os.path.abspath(directory))
+        with self.lock:
+            self._watch_gen += 1
+            self._trusted = {p for p in self._trusted
+                             if os.path.normcase(os.path.dirname(os.path.abspath(p))) != d}
+
+    def _unlink_locked(self, path):
+        self._trusted.discard(path)
+        old = self._path_fp.pop(path, None)
+        if old is None:
+            return
+        fp = old[2]
+        aliases = self._aliases.get(fp)
+        if aliases is not None:
+            aliases.discard(path)
+            if aliases:
+                return
+            del self._aliases[fp]
+        self._loudness.pop(fp, None)
+        self._peaks.pop(fp, None)
+        for key in list(self._fp_keys.get(fp, ())):
+            self._drop_locked(key)
+        for key in [k for k in self.ctier if k[0] == fp]:
+            self._cdrop_locked(key)
+
+    def _fingerprint(self, path, st):
+        memo = self._path_fp.get(path)
+        if memo is not None and memo[0] == st.st_mtime and memo[1] == st.st_size:
+            return memo[2]
+        fp = content_fingerprint(path, st.st_size)
+        with self.lock:
+            if self._path_fp.get(path, (None, None, None))[2] != fp:
+                self._unlink_locked(path)  # arquivo mudou: solta o conteúdo antigo
+            self._path_fp[path] = (st.st_mtime, st.st_size, fp)
+            self._aliases.setdefault(fp, set()).add(path)
+        return fp
+
+    def _stat_fingerprint(self, path):
+        memo = self._path_fp.get(path) if path in self._trusted else None
+        if memo is not None:
+            return _Stat(memo[0], memo[1]), memo[2]  # o watcher avisa se o arquivo mudar
+        gen = self._watch_gen
+        self.stats.incr("stat_calls")
+        st = os.stat(path)
+        fp = self._fingerprint(path, st)
+        if path in self._watched:
+            with self.lock:
+                # nenhuma invalidação entre o stat e agora: passa a confiar no memo
+                if gen == self._watch_gen and path in self._watched:
+                    self._trusted.add(path)
+        return st, fp
+
+    def _acquire(self, path, stream, play=False):
+        st, fp = self._stat_fingerprint(path)
+        sr, ch = self.sr, self.ch
+        key = (fp, sr, ch)          # variante no rate de destino
+        mkey = (fp, NATIVE, ch)     # master no rate nativo
+        with self.lock:
+            # quem vai tocar passa na frente do aquecimento
+            self._unqueue_locked(path)
+            if play and self.admission is not None:
+                self.admission.record(fp)  # open_stream é o caminho do play
+            hit = self._lookup_locked(key, mkey)
+            if hit is not None:
+                self.stats.incr("hits")
+                return hit
+            # single-flight: uma decodificação por chave, os demais esperam
+            clip = self._inflight.get(key)
+            owner = clip is None
+            if owner:
+                clip = StreamingClip(sr, ch, self._estimate_frames(path, st, sr), dtype=self.store_dtype,
+                                     trim_threshold=self.trim_threshold)
+                self._inflight[key] = clip
+                master = self.cache.get(mkey)
+                ckey, packed = self._take_compressed_locked(key, mkey)
+
+        if not owner:
+            self.stats.incr("inflight_joins")
+            if stream:
+                return clip, sr
+            return clip.result(), sr
+
+        if master is None and self.disk is not None:
+            t0 = time.perf_counter()
+            samples = self.disk.get(path, st.st_size, st.st_mtime, sr, ch, clip.dtype)
+            if samples is not None:
+                self.stats.incr("disk_hits")
+                self.stats.observe("disk_read", time.perf_counter() - t0)
+                entry = self._insert(key, samples, sr)
+                if fp not in self._loudness or fp not in self._peaks:
+                    self._adopt_analysis(path, st, key, samples, sr,
+                                         self.disk.get_meta(path, st.st_size, st.st_mtime, sr, ch, clip.dtype))
+                self._settle(key, clip, samples=samples)
+                return self._audible(key, entry)
+            meta = self.disk.get_meta(path, st.st_size, st.st_mtime, NATIVE, ch, clip.dtype)
+            samples = self.disk.get(path, st.st_size, st.st_mtime, NATIVE, ch, clip.dtype) if meta else None
+            if samples is not None:
+                self.stats.incr("disk_master_hits")
+                self.stats.observe("disk_read", time.perf_counter() - t0)
+                master = self._insert(mkey, samples, int(meta["sr"]))
+                if fp not in self._loudness or fp not in self._peaks:
+                    self._adopt_analysis(path, st, mkey, samples, master[1], meta)
+                if master[1] == sr:
+                    self._settle(key, clip, samples=samples)
+                    return self._audible(mkey, master)
+
+        if packed is not None:
+            # camada comprimida (o disco não tinha cópia): descomprime fora de quem pediu o play
+            job, args = self._promote_job, (path, st, key, ckey, packed, master, clip)
+        else:
+            job, args = self._build_job(path, st, key, master, clip)
+        if stream:
+            threading.Thread(target=job, args=args, daemon=True).start()
+            return clip, sr
+        job(*args)
+        return clip.result(), sr
+
+    def _build_job(self, path, st, key, master, clip):
+        if master is not None:
+            # master já decodificado: só reamostra (nada de ffmpeg)
+            self.stats.incr("derives")
+            return self._derive_job, (path, st, key, master, clip)
+        self.stats.incr("misses")
+        return self._decode_job, (path, st, key, clip)
+
+    def _lookup_locked(self, key, mkey):
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            return self._audible(key, entry)
+        entry = self.cache.get(mkey)
+        if entry is not None and entry[1] == key[1]:
+            self.cache.move_to_end(mkey)
+            return self._audible(mkey, entry)
+        return None
+
+    def _audible(self, key, entry):
+        # view sem o silêncio das bordas (slice: nada é copiado)
+        bounds = self._bounds.get(key)
+        if bounds is None and self.trim_threshold and key not in self.cache:
+            bounds = audible_bounds(entry[0], self.trim_threshold)  # não foi admitido na RAM
+        if bounds is None:
+            return entry
+        return entry[0][bounds[0]:bounds[1]], entry[1]
+
+    def _settle(self, key, clip:StreamingClip, samples=None, error=None):
+        with self.lock:
+            if self._inflight.get(key) is clip:
+                del self._inflight[key]
+        if samples is not None:
+            clip.resolve(samples)
+        else:
+            clip.finish(error)
+
+    def _estimate_frames(self, path, st, sr):
+        # duração conhecida (índice da biblioteca): reserva exata, sem realocar no meio
+        seconds = self.library.duration(path, st) if self.library is not None else None
+        if seconds is not None:
+            return int(seconds * sr) + sr // 10
+        # reserva generosa (virtual): lossless ~ 16 bit mono 44.1 kHz, lossy ~ 64 kbps
+        size = st.st_size
+        if path.lower().endswith(LOSSLESS_EXTS):
+            seconds = size / (44100 * 2)
+        else:
+            seconds = size / 8000
+        return int(seconds * sr) + sr
+
+    def _timed_blocks(self, blocks, phase):
+        # tempo gasto dentro do decoder (inclui a conversão para float32)
+        spent = 0.0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                blk = next(blocks, None)
+                spent += time.perf_counter() - t0
+                if blk is None:
+                    break
+                yield blk
+        finally:
+            close = getattr(blocks, "close", None)
+            if close is not None:
+                close()  # abandonado no meio: libera o decoder (ex.: mata o ffmpeg)
+            self.stats.observe(phase, spent)
+
+    def _decode_job(self, path, st, key, clip:StreamingClip):
+        sr, ch = key[1], key[2]
+        mkey = (key[0], NATIVE, ch)
+        t_start = time.perf_counter()
+        try:
+            name, native_sr, blocks = self._open_source(path, ch)
+            self.stats.observe("open." + name, time.perf_counter() - t_start)
+            blocks = self._timed_blocks(blocks, "decode." + name)
+            if native_sr == sr:
+                # rate nativo já é o de destino: master e variante são o mesmo buffer
+                for blk in blocks:
+                    clip.write(blk)
+                    if clip.ready == blk.shape[0]:
+                        self.stats.observe("first_frames", time.perf_counter() - t_start)
+                master = clip
+            else:
+                master = StreamingClip(native_sr, ch, self._estimate_frames(path, st, native_sr), dtype=clip.dtype)
+                rs = make_resampler(native_sr, sr, ch, self.resample_quality)
+                spent = 0.0
+                for blk in blocks:
+                    master.write(blk)
+                    t0 = time.perf_counter()
+                    out = rs.process(blk)
+                    spent += time.perf_counter() - t0
+                    if out.shape[0] and not clip.ready:
+                        self.stats.observe("first_frames", time.perf_counter() - t_start)
+                    clip.write(out)
+                clip.write(rs.flush())
+                self.stats.observe("resample", spent)
+            msamples = master.compact()
+            self._analyze(key[0], msamples, native_sr)
+            if self.disk is not None:
+                t0 = time.perf_counter()
+                self.disk.put(path, st.st_size, st.st_mtime, NATIVE, ch, msamples, clip.dtype,
+                              meta=dict(self._analysis_meta(key[0]), sr=native_sr))
+                self.stats.observe("disk_write", time.perf_counter() - t0)
+            self._insert(mkey, msamples, native_sr)
+            if master is not clip:
+                self._store_variant(path, st, key, clip)
+        except BaseException as e:
+            self.stats.incr("errors")
+            self._settle(key, clip, error=e)
+            return
+        self.stats.observe("decode_total", time.perf_counter() - t_start)
+        self._settle(key, clip)
+
+    def _derive_job(self, path, st, key, master, clip:StreamingClip):
+        """Gera a variante no rate de destino a partir do master (em blocos)."""
+        msamples, native_sr = master
+        t_start = time.perf_counter()
+        try:
+            rs = make_resampler(native_sr, key[1], key[2], self.resample_quality)
+            scale = np.float32(sample_scale(msamples.dtype))
+            for i in range(0, msamples.shape[0], DERIVE_BLOCK):
+                blk = msamples[i:i + DERIVE_BLOCK].astype(np.float32)
+                if scale != 1.0:
+                    blk *= scale
+                clip.write(rs.process(blk))
+            clip.write(rs.flush())
+            self._store_variant(path, st, key, clip)
+        except BaseException as e:
+            self.stats.incr("errors")
+            self._settle(key, clip, error=e)
+            return
+        self.stats.observe("derive", time.perf_counter() - t_start)
+        self._settle(key, clip)
+
+    def _store_variant(self, path, st, key, clip:StreamingClip):
+        samples = clip.compact()
+        if self.disk is not None:
+            t0 = time.perf_counter()
+            self.disk.put(path, st.st_size, st.st_mtime, key[1], key[2], samples, clip.dtype,
+                          meta=self._analysis_meta(key[0]) or None)
+            self.stats.observe("disk_write", time.perf_counter() - t0)
+        self._insert(key, samples, key[1])
+
+    # ----- Camada comprimida -----
+    def _take_compressed_locked(self, key, mkey):
+        for k in (key, mkey):
+            item = self.ctier.get(k)
+            if item is not None and item[1] == key[1]:
+                self._cdrop_locked(k)
+                return k, item[0]
+        return None, None
+
+    def _promote_job(self, path, st, key, ckey, packed, master, clip:StreamingClip):
+        """Sobe da camada comprimida para o PCM (sem disco, sem decoder)."""
+        try:
+            t0 = time.perf_counter()
+            samples = decompress_pcm(packed)
+        except Exception:
+            job, args = self._build_job(path, st, key, master, clip)  # blob inválido
+            return job(*args)
+        self.stats.incr("compressed_hits")
+        self.stats.observe("decompress", time.perf_counter() - t0)
+        self._insert(ckey, samples, key[1])
+        self._settle(key, clip, samples=samples)
+
+    def _cdrop_locked(self, key):
+        packed, _sr = self.ctier.pop(key)
+        self.cbytes -= packed.nbytes
+
+    def _plays(self, fp) -> int:
+        return sum(self._manifest.get(p, (0,))[0] for p in self._aliases.get(fp, ()))
+
+    def _tier_after_evict(self, key, samples, sr) -> bool:
+        """
+        Política por clipe ao sair do PCM: True = desce para a camada comprimida;
+        False = fica só no disco (ou volta pelo decoder).
+        """
+        if samples.dtype != np.int16 or samples.nbytes > COMPRESS_MAX_CLIP_BYTES:
+            return False  # trilha longa: ocuparia a camada inteira
+        if key[1] == NATIVE and sr != self.sr:
+            return False  # master que não é o buffer tocado: o disco basta
+        if isinstance(samples, np.memmap) and self._plays(key[0]) == 0:
+            return False  # só foi aquecido e já está no disco
+        return True
+
+    def _demote_locked(self, key, samples, sr):
+        # comprimir é caro: fica para a thread, fora da trava
+        self._demote_q.put((key, samples, sr))
+        if self._demoter is None:
+            self._demoter = threading.Thread(target=self._demote_worker, daemon=True)
+            self._demoter.start()
+
+    def _demote_worker(self):
+        while True:
+            key, samples, sr = self._demote_q.get()
+            with self.lock:
+                keep = self._tier_after_evict(key, samples, sr)
+            if not keep:
+                continue
+            try:
+                t0 = time.perf_counter()
+                packed = compress_pcm(samples)
+                self.stats.observe("compress", time.perf_counter() - t0)
+            except Exception:
+                continue
+            with self.lock:
+                # voltou para o PCM ou foi esquecido enquanto comprimia
+                if key in self.cache or not self._aliases.get(key[0]) or key in self.ctier:
+                    continue
+                self.ctier[key] = (packed, sr)
+                self.cbytes += packed.nbytes
+                self.stats.incr("demotions")
+                while self.cbytes > self.compressed_max_bytes and self.ctier:
+                    self._cdrop_locked(next(iter(self.ctier)))
+                    self.stats.incr("compressed_evictions")
+
+    # ----- Análise (loudness / forma de onda) -----
+    def _analyze(self, fp, samples, sr):
+        t0 = time.perf_counter()
+        self._loudness[fp] = analyze_loudness(samples, sr)
+        self._peaks[fp] = peak_pyramid(samples)
+        self.stats.observe("analyze", time.perf_counter() - t0)
+
+    def _analysis_meta(self, fp) -> dict:
+        meta = {}
+        loud = self._loudness.get(fp)
+        if loud is not None:
+            meta["loudness"], meta["peak"] = loud
+        levels = self._peaks.get(fp)
+        if levels is not None:
+            meta["wave"] = base64.b64encode(levels[0].astype("<f2").tobytes()).decode("ascii")
+        return meta
+
+    def _adopt_analysis(self, path, st, key, samples, sr, meta):
+        """Usa a análise gravada no .json; cache em disco antigo é analisado em segundo plano."""
+        meta = meta or {}
+        try:
+            if "loudness" in meta:
+                self._loudness[key[0]] = (meta["loudness"], float(meta.get("peak", 1.0)))
+            if "wave" in meta:
+                base = np.frombuffer(base64.b64decode(meta["wave"]), dtype="<f2").reshape(-1, 2)
+                self._peaks[key[0]] = wave_levels(base)
+        except (TypeError, ValueError):
+            pass  # .json inválido: refaz a análise
+        if key[0] in self._loudness and key[0] in self._peaks:
+            return
+        def analyze():
+            self._analyze(key[0], samples, sr)
+            if self.disk is not None:
+                self.disk.put_meta(path, st.st_size, st.st_mtime, key[1], key[2],
+                                   dict(meta, **self._analysis_meta(key[0])), samples.dtype)
+        threading.Thread(target=analyze, daemon=True).start()
+
+    def waveform(self, path, width:int):
+        """Forma de onda [width, 2] (min, max) do clipe, ou None se ainda não analisado. O(width)."""
+        memo = self._path_fp.get(path)
+        levels = self._peaks.get(memo[2]) if memo is not None else None
+        if levels is None or width <= 0:
+            return None
+        return peaks_for_width(levels, width)
+
+    def normalization_gain(self, path) -> float:
+        """
+        Ganho por voz que leva o clipe ao alvo de loudness (1.0 se ainda não
+        analisado). Só memória: o mixer aplica no multiply que já faz.
+        """
+        memo = self._path_fp.get(path)
+        loud = self._loudness.get(memo[2]) if memo is not None else None
+        if self.norm_target is None or loud is None or loud[0] is None:
+            return 1.0
+        db = min(max(self.norm_target - loud[0], -NORM_MAX_CUT_DB), NORM_MAX_BOOST_DB)
+        gain = 10.0 ** (db / 20.0)
+        if gain > 1.0 and loud[1] > 0.0:
+            gain = max(1.0, min(gain, 1.0 / loud[1]))  # reforço não passa do fundo de escala
+        return gain
+
+    # ----- Aquecimento em segundo plano (fila com prioridade) -----
+    def prefetch(self, paths, priority:int=PRIO_WARMUP):
+        """Enfileira paths para decodificar em segundo plano (menor prioridade = antes)."""
+        if priority >= PRIO_WARMUP and self.library is not None:
+            # aquecimento em massa: os mais baratos primeiro (mais clipes prontos cedo)
+            paths = sorted(paths, key=self.library.cost)
+        with self._queue_cv:
+            for p in paths:
+                old = self._queued.get(p)
+                if old is not None:
+                    if old[0] <= priority:
+                        continue
+                    old[3] = False  # reenfileira com prioridade maior
+                item = [priority, next(self._queue_seq), p, True]
+                self._queued[p] = item
+                heapq.heappush(self._queue, item)
+            while len(self._workers) < min(self.prefetch_workers, len(self._queued)):
+                t = threading.Thread(target=self._prefetch_worker, daemon=True)
+                self._workers.append(t)
+                t.start()
+            self._queue_cv.notify_all()
+
+    def cancel_prefetch(self):
+        with self._queue_cv:
+            self._queue.clear()
+            self._queued.clear()
+
+    def _unqueue_locked(self, path):
+        item = self._queued.pop(path, None)
+        if item is not None:
+            item[3] = False
+
+    def _prefetch_worker(self):
+        while True:
+            with self._queue_cv:
+                while not self._queue:
+                    self._queue_cv.wait()
+                item = heapq.heappop(self._queue)
+                if not item[3]:
+                    continue
+                if self._queued.get(item[2]) is item:
+                    del self._queued[item[2]]
+            try:
+                self._warm(item[2])
+            except Exception:
+                pass
+
+    def _warm(self, path):
+        pool = self._decode_pool()
+        if pool is None or not self._warm_in_pool(pool, path):
+            self.load(path)
+
+    def _warm_in_pool(self, pool, path):
+        """
+        Decodifica no pool de processos com a chave registrada em _inflight:
+        quem pedir o clipe no meio (play ou load) espera o resultado do pool,
+        que chega pelo cache em disco, em vez de abrir um segundo decoder.
+        False = já estava em cache ou em decodificação (o chamador faz o load).
+        """
+        st, fp = self._stat_fingerprint(path)
+        sr, ch = self.sr, self.ch
+        key = (fp, sr, ch)
+        with self.lock:
+            if key in self._inflight or self._lookup_locked(key, (fp, NATIVE, ch)) is not None:
+                return False
+            clip = StreamingClip(sr, ch, 1, dtype=self.store_dtype, trim_threshold=self.trim_threshold)
+            self._inflight[key] = clip
+        t0 = time.perf_counter()
+        try:
+            pool.submit(_pool_decode, self.disk.root, path, sr, ch,
+                        self.store_dtype.str, self.resample_quality).result()
+            self.stats.incr("pool_decodes")
+            self.stats.observe("pool_decode", time.perf_counter() - t0)
+        except concurrent.futures.process.BrokenProcessPool:
+            with self.lock:
+                self.decode_processes = 0  # pool quebrado: volta às threads
+                self._pool = None
+        except Exception:
+            pass  # o load abaixo tenta de novo aqui (e propaga o erro real)
+        finally:
+            with self.lock:
+                if self._inflight.get(key) is clip:
+                    del self._inflight[key]
+        # quem entrou no meio recebe o resultado do disco (ou o do decoder local, se o pool falhou)
+        try:
+            samples, _sr = self.load(path)
+        except BaseException as e:
+            clip.finish(e)
             raise
+        clip.resolve(samples)
+        return True
+
+    def _decode_pool(self):
+        with self.lock:
+            if self.decode_processes <= 0:
+                return None
+            if self._pool is None:
+                # spawn: o filho não herda as threads do PortAudio/Qt
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    self.decode_processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
 
-        samples = np.array(seg.get_array_of_samples()).reshape(-1, self.ch).astype(np.float32) / 32768.0
+    def close(self):
+        """Cancela o aquecimento, grava o manifesto e encerra o pool de processos."""
+        self.cancel_prefetch()
+        self.save_manifest()
         with self.lock:
-            self.cache[key] = (samples, self.sr)
-        return self.cache[key]
+            pool, self._pool = self._pool, None
+            self.decode_processes = 0
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ----- Partida quente (manifesto de uso) -----
+    def _read_manifest(self):
+        if not self.manifest_path:
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return {p: [int(v[0]), float(v[1])] for p, v in raw.items()}
+        except (OSError, ValueError, TypeError, IndexError, AttributeError):
+            return {}
+
+    def _score(self, entry, now):
+        plays, last = entry
+        return plays * 0.5 ** (max(0.0, now - last) / MANIFEST_HALF_LIFE)
+
+    def _note_play(self, path):
+        # a contagem vale mesmo sem manifesto em disco (política das camadas)
+        with self.lock:
+            entry = self._manifest.setdefault(path, [0, 0.0])
+            entry[0] += 1
+            entry[1] = time.time()
+            self._plays_unsaved += 1
+            flush = self.manifest_path and self._plays_unsaved >= MANIFEST_SAVE_EVERY and not self._manifest_saving
+            if flush:
+                self._manifest_saving = True
+        if flush:
+            # ordenar + gravar o JSON fica fora do caminho do play
+            threading.Thread(target=self._save_manifest_bg, daemon=True).start()
+
+    def _save_manifest_bg(self):
+        try:
+            self.save_manifest()
+        finally:
+            with self.lock:
+                self._manifest_saving = False
+
+    def save_manifest(self):
+        """Grava o manifesto (só os MANIFEST_MAX clipes de maior pontuação)."""
+        if not self.manifest_path:
+            return
+        now = time.time()
+        with self.lock:
+            ranked = sorted(self._manifest.items(), key=lambda kv: self._score(kv[1], now), reverse=True)
+            self._manifest = dict(ranked[:MANIFEST_MAX])
+            data = {p: list(v) for p, v in self._manifest.items()}
+            self._plays_unsaved = 0
+        tmp = f"{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.manifest_path)
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def warm_start(self, top_n:int=WARMSTART_TOP_N, io_budget:int=WARMSTART_IO_BYTES):
+        """
+        Pré-carrega os clipes mais tocados em segundo plano; não bloqueia (a UI
+        chama na partida). O ranking e os tamanhos ficam na thread (ver _warm_start_paths).
+        """
+        t = threading.Thread(target=self._warm_start_paths, args=(top_n, io_budget), daemon=True)
+        t.start()
+        return t
+
+    def _warm_start_paths(self, top_n:int, io_budget:int):
+        """
+        Enfileira os mais tocados (em ordem de pontuação) até top_n arquivos ou
+        io_budget bytes lidos da origem. Tamanho do índice da biblioteca quando
+        houver; stat() só para os que ele não conhece. Devolve os paths enfileirados.
+        """
+        now = time.time()
+        with self.lock:
+            ranked = sorted(self._manifest.items(), key=lambda kv: self._score(kv[1], now), reverse=True)
+        paths, spent = [], 0
+        for p, _entry in ranked:
+            if len(paths) >= top_n:
+                break
+            entry = self.library.peek(p) if self.library is not None else None
+            if entry is not None:
+                size = entry["size"]
+            else:
+                try:
+                    size = os.stat(p).st_size
+                except OSError:
+                    continue  # arquivo sumiu: sai do ranking na próxima gravação
+            if spent + size > io_budget:
+                continue
+            spent += size
+            paths.append(p)
+        self.prefetch(paths, PRIO_WARMSTART)  # mesma prioridade: a fila respeita a ordem
+        return paths
+
+    def _open_source(self, path, ch):
+        """Abre o decoder: devolve (nome, rate nativo, iterador de blocos float32 [n, ch])."""
+        return open_decoder(path, ch)
+
+    # ----- Estatísticas -----
+    def resident(self):
+        """Bytes por chave em cache: [(key, bytes, memmap?, paths)], do mais antigo ao mais recente."""
+        with self.lock:
+            return [(key, samples.nbytes, isinstance(samples, np.memmap), sorted(self._aliases.get(key[0], ())))
+                    for key, (samples, _sr) in self.cache.items()]
+
+    def stats_snapshot(self) -> dict:
+        """Contadores, histogramas por fase e ocupação atual (para UI e testes)."""
+        snap = self.stats.snapshot()
+        with self.lock:
+            snap["bytes"] = self.bytes
+            snap["max_bytes"] = self.max_bytes
+            snap["entries"] = len(self.cache)
+            snap["compressed_bytes"] = self.cbytes
+            snap["compressed_pcm_bytes"] = sum(p.pcm_bytes for p, _sr in self.ctier.values())
+            snap["compressed_entries"] = len(self.ctier)
+            snap["inflight"] = len(self._inflight)
+            snap["queued"] = len(self._queued)
+        return snap
+
+    def _admit_locked(self, key, nbytes) -> bool:
+        if self.admission is None:
+            return True
+        need = self.bytes + nbytes - self.max_bytes
+        if need <= 0 or not self.pinned.isdisjoint(self._aliases.get(key[0], ())):
+            return True
+        # as vítimas que o LRU escolheria para abrir espaço
+        victims, freed = [], 0
+        for k, (samples, _sr) in self.cache.items():
+            if freed >= need:
+                break
+            if not self.pinned.isdisjoint(self._aliases.get(k[0], ())):
+                continue
+            victims.append(k[0])
+            freed += samples.nbytes
+        return self.admission.admit(key[0], victims)
+
+    def _insert(self, key, samples, sr):
+        entry = (samples, sr)
+        bounds = audible_bounds(samples, self.trim_threshold) if self.trim_threshold else None
+        with self.lock:
+            if key in self.cache:
+                self._drop_locked(key)
+            # nenhum path aponta mais para o conteúdo (forget durante a decodificação)
+            if self._aliases.get(key[0]):
+                if not self._admit_locked(key, samples.nbytes):
+                    self.stats.incr("admission_rejects")
+                    if self.compressed_max_bytes > 0:
+                        self._demote_locked(key, samples, sr)  # a política de camadas decide
+                    return entry
+                self.cache[key] = entry
+                if bounds is not None:
+                    self._bounds[key] = bounds
+                self._fp_keys.setdefault(key[0], set()).add(key)
+                self.bytes += samples.nbytes
+                self._evict_locked()
+        return entry
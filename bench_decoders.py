@@ -0,0 +1,87 @@
+"""
+Benchmark dos decoders: vazão de cada backend do registro por formato.
+
+    python bench_decoders.py [segundos de áudio] [repetições]
+
+Gera um trecho estéreo 44.1 kHz (tom + ruído) em WAV, FLAC, OGG e MP3 (os
+que der para gravar aqui) e decodifica cada arquivo com cada backend que
+aceita a extensão. Backend ou codificador ausente aparece como indisponível.
+"""
+import os, sys, time, wave, shutil, tempfile, subprocess
+import numpy as np
+from decoders import decoder_names, open_with, ffmpeg_paths, Unsupported, sf
+
+SR = 44100
+CH = 2
+
+def _signal(seconds:float) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    rng = np.random.default_rng(0)
+    x = 0.3 * np.sin(2 * np.pi * 440.0 * t)[:, None] + 0.05 * rng.standard_normal((t.shape[0], CH))
+    return x.astype(np.float32)
+
+def _write_wav(path, x):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(CH); w.setsampwidth(2); w.setframerate(SR)
+        w.writeframes((np.clip(x, -1, 1) * 32767).astype("<i2").tobytes())
+
+def make_files(root, seconds):
+    """{formato: path | motivo de não ter o arquivo}"""
+    x = _signal(seconds)
+    files = {"wav": os.path.join(root, "bench.wav")}
+    _write_wav(files["wav"], x)
+    for fmt in ("flac", "ogg"):
+        if sf is None:
+            files[fmt] = "soundfile não instalado"
+            continue
+        path = os.path.join(root, f"bench.{fmt}")
+        try:
+            sf.write(path, x, SR, format=fmt.upper(), subtype="VORBIS" if fmt == "ogg" else None)
+            files[fmt] = path
+        except Exception as e:
+            files[fmt] = f"libsndfile sem {fmt}: {e}"
+    ffm, _ffp = ffmpeg_paths()
+    path = os.path.join(root, "bench.mp3")
+    try:
+        subprocess.run([ffm, "-v", "error", "-y", "-i", files["wav"], "-b:a", "192k", path],
+                       check=True, capture_output=True)
+        files["mp3"] = path
+    except (TypeError, OSError, subprocess.CalledProcessError):
+        files["mp3"] = "ffmpeg não encontrado"
+    return files
+
+def bench(name, path, repeat):
+    """Melhor tempo (s) de uma decodificação completa e frames entregues."""
+    best, frames = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _sr, blocks = open_with(name, path, CH)
+        frames = sum(b.shape[0] for b in blocks)
+        best = min(best, time.perf_counter() - t0)
+    return best, frames
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 30.0
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    root = tempfile.mkdtemp(prefix="finoboard-bench-")
+    try:
+        files = make_files(root, seconds)
+        print(f"{seconds:g} s estéreo {SR} Hz, melhor de {repeat}")
+        print(f"{'formato':8} {'backend':10} {'tempo':>9} {'x real':>8} {'MB/s PCM':>9}")
+        for fmt, path in files.items():
+            if not os.path.isfile(path):
+                print(f"{fmt:8} {'-':10} indisponível ({path})")
+                continue
+            for name in decoder_names(path):
+                try:
+                    spent, frames = bench(name, path, repeat)
+                except (Unsupported, RuntimeError, OSError) as e:
+                    print(f"{fmt:8} {name:10} indisponível ({e})")
+                    continue
+                mb = frames * CH * 4 / 1e6
+                print(f"{fmt:8} {name:10} {spent * 1000:7.1f}ms {frames / SR / spent:7.0f}x {mb / spent:9.0f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark do mixer: custo dos callbacks de áudio por número de vozes e
+pelo tipo das amostras das vozes (float32 ou int16 guardado no cache).
+
+    python bench_mixer.py [blocos medidos] [blocksize]
+
+Troca o sounddevice por streams falsos que só guardam os callbacks (como em
+tests/test_mixer_alloc.py) e chama mic -> saída principal -> monitor na mão,
+com o relógio avançando um bloco por volta. Mostra mediana e p99 de cada
+callback e quanto do orçamento do bloco (blocksize / samplerate) eles usam.
+As vozes int16 são convertidas para float32 dentro do callback: a diferença
+entre as duas linhas é o custo dessa conversão.
+"""
+import sys, time, types
+import numpy as np
+
+try:
+    import sounddevice  # noqa: F401
+except Exception:  # sem PortAudio/pacote: o mixer só precisa do módulo para importar
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+import mixer
+
+SR = 48000
+VOICES = (1, 8, 32, 64, 128)
+WARMUP_BLOCKS = 200
+DTYPES = (np.float32, np.int16)
+
+class _Stream:
+    def __init__(self, callbacks, device=None, callback=None, **_kw):
+        callbacks[device] = callback
+
+    def start(self): pass
+    def stop(self): pass
+    def close(self): pass
+
+def make_mixer(voices:int, blocksize:int):
+    """Mixer com mic, saída e monitor falsos: (mixer, relógio, {device: callback})."""
+    callbacks, clock = {}, [0.0]
+    mixer.sd = types.SimpleNamespace(
+        query_devices=lambda *_a, **_k: {"default_samplerate": SR, "max_input_channels": 1},
+        InputStream=lambda **kw: _Stream(callbacks, **kw),
+        OutputStream=lambda **kw: _Stream(callbacks, **kw))
+    mixer.time = types.SimpleNamespace(perf_counter=lambda: clock[0])
+    m = mixer.Mixer(SR, 2, blocksize, max_voices=voices)
+    m.set_devices(1, 2, 3)
+    return m, clock, callbacks
+
+def clips(count:int, dtype=np.float32, seconds:float=10.0):
+    rng = np.random.default_rng(0)
+    out = []
+    for _ in range(count):
+        x = rng.standard_normal((int(seconds * SR), 2)) * 0.1
+        out.append((x * 32767).astype(np.int16) if dtype == np.int16 else x.astype(np.float32))
+    return out
+
+def bench(voices:int, blocksize:int, blocks:int, dtype=np.float32):
+    """Tempos (s) por callback: {"main": [...], "mon": [...]}."""
+    m, clock, cbs = make_mixer(voices, blocksize)
+    # clipes mais longos que a medição: nenhuma voz termina no meio
+    seconds = (WARMUP_BLOCKS + blocks) * blocksize / SR + 1.0
+    sources = clips(min(voices, 8), dtype, seconds)
+    for k in range(voices):
+        m.play_clip(sources[k % len(sources)], SR)
+    indata = np.zeros((blocksize, 1), dtype=np.float32)
+    outdata = np.zeros((blocksize, 2), dtype=np.float32)
+    times = {"main": [], "mon": []}
+    for i in range(WARMUP_BLOCKS + blocks):
+        clock[0] += blocksize / SR
+        cbs[1](indata, blocksize, None, None)
+        for name, dev in (("main", 2), ("mon", 3)):
+            t0 = time.perf_counter()
+            cbs[dev](outdata, blocksize, None, None)
+            if i >= WARMUP_BLOCKS:
+                times[name].append(time.perf_counter() - t0)
+    assert m.voice_count() == voices
+    return times
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    blocksize = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    budget = blocksize / SR
+    print(f"blocos de {blocksize} frames a {SR} Hz (orçamento {budget * 1e3:.2f} ms), {blocks} medidos, mic ligado")
+    print(f"{'vozes':>5} {'tipo':>7} {'principal':>10} {'p99':>8} {'monitor':>10} {'p99':>8} {'us/voz':>7} {'orçamento':>9}")
+    for voices in VOICES:
+        for dtype in DTYPES:
+            t = {k: np.array(v) * 1e6 for k, v in bench(voices, blocksize, blocks, dtype).items()}
+            main_us, mon_us = np.median(t["main"]), np.median(t["mon"])
+            total = main_us + mon_us
+            print(f"{voices:5d} {np.dtype(dtype).name:>7} {main_us:8.1f}us {np.percentile(t['main'], 99):6.1f}us "
+                  f"{mon_us:8.1f}us {np.percentile(t['mon'], 99):6.1f}us "
+                  f"{total / voices:7.2f} {total / (budget * 1e6) * 100:8.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark da reamostragem: frames por segundo de cada nível de qualidade
+do resampler contra o caminho antigo (pydub set_frame_rate -> audioop.ratecv).
+
+    python bench_resampler.py [segundos de áudio] [repetições]
+
+Gera um trecho estéreo (tom + ruído) no rate de origem e reamostra com cada
+caminho; a vazão é em frames de entrada por segundo de CPU (melhor de N).
+O pydub só trabalha em int16: a conversão para float32 entra na conta dele.
+"""
+import sys, time
+import numpy as np
+from resampler import resample, QUALITY_FAST, QUALITY_MEDIUM, QUALITY_HIGH
+
+try:
+    from pydub import AudioSegment
+except Exception:  # sem pydub/audioop (Python 3.13+ sem o backport): só o resampler
+    AudioSegment = None
+
+CH = 2
+RATES = ((44100, 48000), (48000, 44100), (22050, 48000))
+
+def _signal(seconds:float, sr:int) -> np.ndarray:
+    t = np.arange(int(seconds * sr)) / sr
+    rng = np.random.default_rng(0)
+    x = 0.3 * np.sin(2 * np.pi * 440.0 * t)[:, None] + 0.05 * rng.standard_normal((t.shape[0], CH))
+    return x.astype(np.float32)
+
+def _pydub(x, sr_in, sr_out):
+    """O caminho antigo do AudioCache: int16 pelo audioop, de volta a float32."""
+    pcm = (np.clip(x, -1, 1) * 32767).astype("<i2")
+    seg = AudioSegment(pcm.tobytes(), frame_rate=sr_in, sample_width=2, channels=CH).set_frame_rate(sr_out)
+    return np.array(seg.get_array_of_samples()).reshape(-1, CH).astype(np.float32) / 32768.0
+
+def paths():
+    """{nome: reamostrar(x, sr_in, sr_out) | motivo de não estar disponível}"""
+    out = {"pydub/audioop": _pydub if AudioSegment is not None else "pydub não instalado"}
+    for quality in (QUALITY_FAST, QUALITY_MEDIUM, QUALITY_HIGH):
+        out[quality] = lambda x, sr_in, sr_out, q=quality: resample(x, sr_in, sr_out, q)
+    return out
+
+def bench(fn, x, sr_in, sr_out, repeat):
+    """Melhor tempo (s) e frames de saída."""
+    best, frames = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        frames = fn(x, sr_in, sr_out).shape[0]
+        best = min(best, time.perf_counter() - t0)
+    return best, frames
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{seconds:g} s estéreo, melhor de {repeat}")
+    print(f"{'rates':13} {'caminho':14} {'tempo':>9} {'x real':>8} {'Mframes/s':>10} {'saída':>9}")
+    for sr_in, sr_out in RATES:
+        x = _signal(seconds, sr_in)
+        rates = f"{sr_in}->{sr_out}"
+        for name, fn in paths().items():
+            if isinstance(fn, str):
+                print(f"{rates:13} {name:14} indisponível ({fn})")
+                continue
+            try:
+                spent, frames = bench(fn, x, sr_in, sr_out, repeat)
+            except Exception as e:  # audioop ausente no Python sem o módulo
+                print(f"{rates:13} {name:14} indisponível ({e})")
+                continue
+            print(f"{rates:13} {name:14} {spent * 1000:7.1f}ms {seconds / spent:7.0f}x "
+                  f"{x.shape[0] / spent / 1e6:10.2f} {frames:9d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import bisect, collections, threading
+
+# limites (ms) dos baldes do histograma: 0.25 ms ... ~8 s, em potências de 2
+BUCKET_BOUNDS_MS = tuple(0.25 * 2 ** i for i in range(16))
+
+class LatencyHistogram:
+    """Histograma de latência com baldes fixos (log2): registrar é O(log baldes)."""
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)  # último = acima do teto
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds:float):
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.n += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q:float) -> float:
+        """Limite superior (ms) do balde que contém o quantil q (no máximo o maior valor visto)."""
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(BUCKET_BOUNDS_MS[i], self.max) if i < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.n,
+            "mean_ms": self.total / self.n if self.n else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": self.max,
+            "buckets": list(self.counts),
+        }
+
+class CacheStats:
+    """
+    Contadores e histogramas por fase do AudioCache. Trava própria e curta
+    (nunca a do cache), barato o bastante para ficar sempre ligado.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+        self.phases = {}  # fase -> LatencyHistogram
+
+    def incr(self, name:str, n:int=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, phase:str, seconds:float):
+        with self._lock:
+            hist = self.phases.get(phase)
+            if hist is None:
+                hist = self.phases[phase] = LatencyHistogram()
+            hist.add(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.phases.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "phases": {name: h.snapshot() for name, h in self.phases.items()},
+            }
@@ -0,0 +1,288 @@
+import os, shutil, subprocess, wave, json
+import numpy as np
+from pydub import AudioSegment
+from json import JSONDecodeError
+
+try:
+    import soundfile as sf  # libsndfile (opcional): FLAC/OGG sem processo externo
+except Exception:
+    sf = None
+
+# leitura do pipe do ffmpeg no modo streaming (~40 ms de áudio estéreo a 48 kHz)
+STREAM_READ_BYTES = 16384
+# frames por bloco nos decoders em processo
+NATIVE_BLOCK = 65536
+
+class Unsupported(Exception):
+    """O decoder não atende este arquivo: tenta o próximo do registro."""
+
+# registro: (nome, extensões ou None = todas, abrir(path, ch) -> (sr nativo, blocos float32 [n, ch]),
+#            sondar(path) -> metadados | None)
+_DECODERS = []
+
+def register_decoder(name:str, exts, opener, first:bool=False, prober=None):
+    entry = (name, tuple(e.lower() for e in exts) if exts else None, opener, prober)
+    if first:
+        _DECODERS.insert(0, entry)
+    else:
+        _DECODERS.append(entry)
+
+def decoder_names(path:str):
+    """Decoders que serão tentados (em ordem) para este arquivo."""
+    ext = os.path.splitext(path)[1].lower()
+    return [name for name, exts, _op, _pr in _DECODERS if exts is None or ext in exts]
+
+def open_decoder(path:str, ch:int):
+    """Abre o primeiro decoder que aceitar o arquivo: (nome, rate nativo, iterador de blocos)."""
+    ext = os.path.splitext(path)[1].lower()
+    for name, exts, opener, _prober in _DECODERS:
+        if exts is not None and ext not in exts:
+            continue
+        try:
+            return (name,) + tuple(opener(path, ch))
+        except Unsupported:
+            continue
+    raise RuntimeError(f"Nenhum decoder disponível para {os.path.basename(path)}.")
+
+def open_with(name:str, path:str, ch:int):
+    """Abre com um decoder específico do registro (benchmark/diagnóstico): (rate nativo, blocos)."""
+    for dname, _exts, opener, _prober in _DECODERS:
+        if dname == name:
+            return opener(path, ch)
+    raise KeyError(name)
+
+def probe_audio(path:str):
+    """
+    Metadados sem decodificar: {"duration", "sr", "channels", "codec"} ou None.
+    Usa o primeiro decoder do registro que souber ler o cabeçalho.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    for _name, exts, _opener, prober in _DECODERS:
+        if prober is None or (exts is not None and ext not in exts):
+            continue
+        try:
+            return prober(path)
+        except Unsupported:
+            continue
+    return None
+
+def open_audio(path:str, ch:int):
+    """Como open_decoder, sem o nome: (rate nativo, iterador de blocos)."""
+    return open_decoder(path, ch)[1:]
+
+def _map_channels(x:np.ndarray, ch:int) -> np.ndarray:
+    if x.shape[1] == ch:
+        return x
+    if x.shape[1] == 1:
+        return np.repeat(x, ch, axis=1)
+    if ch == 1:
+        return x.mean(axis=1, keepdims=True, dtype=np.float32)
+    raise Unsupported(f"{x.shape[1]} canais")  # downmix multicanal fica com o ffmpeg
+
+# ----- WAV PCM: stdlib wave + numpy -----
+def _pcm_to_float(raw:bytes, width:int, nch:int) -> np.ndarray:
+    if width == 1:
+        x = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) * (1.0 / 128.0)
+    elif width == 2:
+        x = np.frombuffer(raw, dtype="<i2").astype(np.float32) * (1.0 / 32768.0)
+    elif width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        v = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        v = np.where(v & 0x800000, v - 0x1000000, v)
+        x = v.astype(np.float32) * (1.0 / 8388608.0)
+    else:
+        x = np.frombuffer(raw, dtype="<i4").astype(np.float32) * (1.0 / 2147483648.0)
+    return x.reshape(-1, nch)
+
+def _open_wave(path, ch):
+    try:
+        w = wave.open(path, "rb")
+    except (wave.Error, EOFError) as e:
+        raise Unsupported(str(e))  # float/extensible etc.: ffmpeg resolve
+    nch, width, sr = w.getnchannels(), w.getsampwidth(), w.getframerate()
+    if nch not in (1, 2) or width not in (1, 2, 3, 4):
+        w.close()
+        raise Unsupported(f"WAV {nch} canais / {width * 8} bits")
+    def blocks():
+        with w:
+            while True:
+                raw = w.readframes(NATIVE_BLOCK)
+                if not raw:
+                    break
+                yield _map_channels(_pcm_to_float(raw, width, nch), ch)
+    return sr, blocks()
+
+def _probe_wave(path):
+    try:
+        with wave.open(path, "rb") as w:
+            sr, width = w.getframerate(), w.getsampwidth()
+            return {"duration": w.getnframes() / sr, "sr": sr, "channels": w.getnchannels(),
+                    "codec": "pcm_u8" if width == 1 else f"pcm_s{width * 8}le"}
+    except (wave.Error, EOFError, ZeroDivisionError) as e:
+        raise Unsupported(str(e))
+
+# ----- FLAC/OGG: libsndfile -----
+def _open_soundfile(path, ch):
+    if sf is None:
+        raise Unsupported("soundfile não instalado")
+    try:
+        f = sf.SoundFile(path)
+    except Exception as e:
+        raise Unsupported(str(e))
+    if f.channels not in (1, 2):
+        f.close()
+        raise Unsupported(f"{f.channels} canais")
+    def blocks():
+        with f:
+            for blk in f.blocks(blocksize=NATIVE_BLOCK, dtype="float32", always_2d=True):
+                yield _map_channels(blk, ch)
+    return f.samplerate, blocks()
+
+def _probe_soundfile(path):
+    if sf is None:
+        raise Unsupported("soundfile não instalado")
+    try:
+        info = sf.info(path)
+    except Exception as e:
+        raise Unsupported(str(e))
+    return {"duration": info.frames / info.samplerate, "sr": info.samplerate, "channels": info.channels,
+            "codec": f"{info.format}/{info.subtype}".lower()}
+
+# ----- ffmpeg (fallback universal: MP3/M4A/...) -----
+def ffmpeg_paths():
+    ffm = getattr(AudioSegment, "converter", None) or shutil.which("ffmpeg") or shutil.which("ffmpeg.exe")
+    ffp = getattr(AudioSegment, "ffprobe", None) or shutil.which("ffprobe") or shutil.which("ffprobe.exe")
+    return ffm, ffp
+
+def _read_exact(f, n:int) -> bytes:
+    buf = b""
+    while len(buf) < n:
+        chunk = f.read(n - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+def _read_wav_header(f):
+    """
+    Lê o cabeçalho WAV que o ffmpeg escreve no pipe (tamanhos inválidos, só
+    importam fmt/data) e para no início das amostras. Devolve o samplerate ou None.
+    """
+    head = _read_exact(f, 12)
+    if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+    sr = None
+    while True:
+        hdr = _read_exact(f, 8)
+        if len(hdr) < 8:
+            return None
+        cid, size = hdr[:4], int.from_bytes(hdr[4:8], "little")
+        if cid == b"data":
+            return sr
+        body = _read_exact(f, size + (size & 1))
+        if cid == b"fmt " and len(body) >= 8:
+            sr = int.from_bytes(body[4:8], "little")
+
+def _ffmpeg_error(rc, err:bytes) -> RuntimeError:
+    lines = err.decode("utf-8", "replace").strip().splitlines()
+    return RuntimeError("ffmpeg falhou ao decodificar o arquivo: " + (lines[-1] if lines else f"código {rc}"))
+
+def _ffmpeg_cmd(ffm, path, ch):
+    # WAV float32 no rate nativo: o cabeçalho diz o samplerate, sem ffprobe
+    return [ffm, "-nostdin", "-hide_banner", "-v", "error",
+            "-i", path, "-vn", "-map", "0:a:0", "-map_metadata", "-1",
+            "-f", "wav", "-acodec", "pcm_f32le", "-ac", str(ch), "-"]
+
+def _close_ffmpeg(proc, kill=False):
+    err = b""
+    try:
+        if kill and proc.poll() is None:
+            proc.kill()
+        err = proc.stderr.read()
+    finally:
+        rc = proc.wait()
+        proc.stdout.close(); proc.stderr.close()
+    return rc, err
+
+def _iter_ffmpeg(proc, ch):
+    frame_bytes = 4 * ch
+    rest = b""
+    eof = False
+    try:
+        while True:
+            buf = proc.stdout.read(STREAM_READ_BYTES)  # devolve o que já estiver no pipe
+            if not buf:
+                break
+            if rest:
+                buf = rest + buf
+            n = len(buf) // frame_bytes
+            rest = buf[n * frame_bytes:]
+            if n:
+                yield np.frombuffer(buf, dtype="<f4", count=n * ch).reshape(n, ch)
+        eof = True
+    finally:
+        # abandonado no meio (erro/close do gerador): mata o processo
+        rc, err = _close_ffmpeg(proc, kill=not eof)
+    if rc != 0:
+        raise _ffmpeg_error(rc, err)
+
+def _open_ffmpeg(path, ch):
+    # um único processo: ffmpeg já entrega float32 com os canais de destino
+    # (sem ffprobe, sem passar por int16 e sem cópias extras no numpy)
+    ffm, _ffp = ffmpeg_paths()
+    if not ffm:
+        raise Unsupported("ffmpeg não encontrado")
+    try:
+        proc = subprocess.Popen(_ffmpeg_cmd(ffm, path, ch),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    except FileNotFoundError:
+        raise Unsupported("ffmpeg não encontrado")  # executável não existe de fato: cai no pydub
+    try:
+        native_sr = _read_wav_header(proc.stdout)
+    except BaseException:
+        _close_ffmpeg(proc, kill=True)
+        raise
+    if native_sr is None:
+        raise _ffmpeg_error(*_close_ffmpeg(proc))
+    return native_sr, _iter_ffmpeg(proc, ch)
+
+def _probe_ffprobe(path):
+    _ffm, ffp = ffmpeg_paths()
+    if not ffp:
+        raise Unsupported("ffprobe não encontrado")
+    try:
+        out = subprocess.run([ffp, "-v", "error", "-select_streams", "a:0",
+                              "-show_entries", "stream=codec_name,sample_rate,channels,duration:format=duration",
+                              "-of", "json", path], capture_output=True, timeout=30).stdout
+        info = json.loads(out or b"{}")
+        stream = (info.get("streams") or [{}])[0]
+        duration = stream.get("duration") or info.get("format", {}).get("duration")
+        return {"duration": float(duration), "sr": int(stream["sample_rate"]),
+                "channels": int(stream["channels"]), "codec": stream.get("codec_name", "")}
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, TypeError):
+        raise Unsupported("ffprobe sem metadados de áudio")
+
+# ----- pydub (último recurso) -----
+def _open_pydub(path, ch):
+    try:
+        # caminho normal (usa ffprobe para metadados)
+        seg = AudioSegment.from_file(path).set_channels(ch).set_sample_width(2)
+    except JSONDecodeError as jde:
+        # saída do ffprobe não era JSON -> explicar melhor
+        ffm, ffp = ffmpeg_paths()
+        hint = []
+        if not ffp:
+            hint.append("ffprobe não encontrado no PATH.")
+        if not ffm:
+            hint.append("ffmpeg não encontrado no PATH.")
+        raise RuntimeError(
+            "Falha ao analisar o arquivo de áudio (ffprobe retornou saída inválida). "
+            + (" ".join(hint) if hint else "Verifique a instalação do FFmpeg/ffprobe.")
+        ) from jde
+    samples = np.array(seg.get_array_of_samples()).reshape(-1, ch).astype(np.float32) / 32768.0
+    return seg.frame_rate, iter((samples,))
+
+register_decoder("wave", (".wav",), _open_wave, prober=_probe_wave)
+register_decoder("soundfile", (".flac", ".ogg", ".oga", ".wav", ".aif", ".aiff"), _open_soundfile, prober=_probe_soundfile)
+register_decoder("ffmpeg", None, _open_ffmpeg, prober=_probe_ffprobe)
+register_decoder("pydub", None, _open_pydub)
@@ -0,0 +1,111 @@
+import os, hashlib, threading, json
+import numpy as np
+
+# teto padrão do cache em disco (PCM decodificado)
+DEFAULT_DISK_BYTES = 8 * 1024 * 1024 * 1024
+
+class DiskPCMCache:
+    """
+    Segundo nível do AudioCache: PCM já decodificado em arquivos .npy.
+    A chave inclui path, tamanho, mtime, samplerate, canais e dtype; a releitura
+    usa memmap (só page-faults, sem ffmpeg).
+    """
+    PRUNE_EVERY = 64
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_DISK_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _file_for(self, path, size, mtime, sr, ch, dtype) -> str:
+        dt = np.dtype(dtype)
+        suffix = "" if dt == np.float32 else f"|{dt.str}"  # mantém os arquivos float32 já gravados
+        raw = f"{os.path.abspath(path)}|{size}|{mtime!r}|{sr}|{ch}{suffix}".encode("utf-8", "surrogatepass")
+        return os.path.join(self.root, hashlib.sha1(raw).hexdigest() + ".npy")
+
+    def get(self, path, size, mtime, sr, ch, dtype=np.float32):
+        fn = self._file_for(path, size, mtime, sr, ch, dtype)
+        try:
+            data = np.load(fn, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # arquivo truncado/corrompido: descarta e decodifica de novo
+            try: os.remove(fn)
+            except OSError: pass
+            return None
+        if data.ndim != 2 or data.shape[1] != ch or data.dtype != np.dtype(dtype):
+            return None
+        return data
+
+    def get_meta(self, path, size, mtime, sr, ch, dtype=np.float32):
+        """Metadados gravados junto do PCM (ex.: samplerate nativo do master)."""
+        fn = self._file_for(path, size, mtime, sr, ch, dtype)[:-4] + ".json"
+        try:
+            with open(fn, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, path, size, mtime, sr, ch, samples: np.ndarray, dtype=np.float32, meta=None):
+        fn = self._file_for(path, size, mtime, sr, ch, dtype)
+        tmp = f"{fn}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(samples, dtype=dtype))
+            os.replace(tmp, fn)
+            if meta is not None:
+                # o .json vai por último: sem ele o master não é usado
+                self._write_meta(fn, tmp, meta)
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+            return
+        with self._lock:
+            self._writes += 1
+            do_prune = self._writes % self.PRUNE_EVERY == 0
+        if do_prune:
+            self.prune()
+
+    def put_meta(self, path, size, mtime, sr, ch, meta, dtype=np.float32):
+        """Regrava só os metadados (ex.: análise feita depois do PCM já estar em disco)."""
+        fn = self._file_for(path, size, mtime, sr, ch, dtype)
+        tmp = f"{fn}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._write_meta(fn, tmp, meta)
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def _write_meta(self, fn, tmp, meta):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, fn[:-4] + ".json")
+
+    def prune(self):
+        """Remove os arquivos menos usados até caber em max_bytes."""
+        files = []
+        total = 0
+        try:
+            with os.scandir(self.root) as it:
+                for e in it:
+                    if not e.name.endswith(".npy"): continue
+                    try: st = e.stat()
+                    except OSError: continue
+                    files.append((max(st.st_atime, st.st_mtime), st.st_size, e.path))
+                    total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        files.sort()
+        for _t, size, fn in files:
+            if total <= self.max_bytes: break
+            try:
+                os.remove(fn); total -= size
+            except OSError:
+                continue  # memmap ainda aberto (Windows) — tenta na próxima
+            try: os.remove(fn[:-4] + ".json")
+            except OSError: pass
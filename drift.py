@@ -0,0 +1,179 @@
+from resampler import VariableResampler
+
+# malha de correção: constante de tempo (s) para absorver um erro de nível
+LOOP_SECONDS = 10.0
+# suavização do nível medido (s): entre callbacks de clocks diferentes ele oscila um bloco
+SMOOTH_SECONDS = 1.0
+# correção máxima da malha sobre a razão estimada (deriva real de cristal: dezenas de ppm)
+MAX_CORRECTION = 0.005
+# estimativa por timestamps: descarta o início do stream e espera uma janela mínima
+RATE_SETTLE_SECONDS = 1.0
+RATE_MIN_SECONDS = 5.0
+
+class ClockRate:
+    """
+    Taxa real (frames por segundo no relógio do host) de um stream, medida
+    pelos callbacks: frames entregues desde uma âncora / tempo decorrido.
+    Escrita só pelo callback do próprio stream; lida por outros sem trava e
+    sem alocar: o último par tempo/frames alterna entre dois slots
+    pré-alocados e é publicado trocando o índice; a âncora, escrita uma vez,
+    publica os frames antes do tempo.
+    """
+    __slots__ = ("nominal", "frames", "_start", "_anchor_t", "_anchor_n", "_last", "_cur")
+
+    def __init__(self, nominal:float):
+        self.nominal = float(nominal)
+        self.frames = 0
+        self._start = None
+        self._anchor_t = None  # depois do período de acomodação
+        self._anchor_n = 0
+        self._last = ([0.0, 0], [0.0, 0])  # [t, frames antes do bloco] dos últimos callbacks
+        self._cur = -1                     # slot publicado; -1 = nenhum callback ainda
+
+    def tick(self, frames:int, t:float):
+        """No início do callback, com o tamanho do bloco atual."""
+        if self._start is None:
+            self._start = t
+        elif self._anchor_t is None and t - self._start >= RATE_SETTLE_SECONDS:
+            self._anchor_n = self.frames
+            self._anchor_t = t
+        cur = 0 if self._cur else 1
+        last = self._last[cur]
+        last[0] = t
+        last[1] = self.frames
+        self._cur = cur
+        self.frames += frames
+
+    @property
+    def running(self) -> bool:
+        return self._cur >= 0
+
+    def rate(self) -> float:
+        t0 = self._anchor_t
+        if t0 is None:
+            return self.nominal
+        t, n = self._last[self._cur]
+        if t - t0 < RATE_MIN_SECONDS:
+            return self.nominal
+        return (n - self._anchor_n) / (t - t0)
+
+    def position(self, t:float) -> float:
+        """Frames entregues até o instante t (extrapolado a partir do último callback)."""
+        cur = self._cur
+        if cur < 0:
+            return 0.0
+        t1, n = self._last[cur]
+        return n + (t - t1) * self.rate()
+
+class DriftController:
+    """
+    Malha PI (criticamente amortecida) que transforma o erro de nível em
+    frames numa razão de leitura: frames de origem por frame de saída.
+    `ff` é a razão estimada pelos timestamps; a malha só corrige o resíduo.
+    """
+    __slots__ = ("kp", "ki", "smooth", "err", "integ", "ratio")
+
+    def __init__(self, samplerate:int):
+        loop = LOOP_SECONDS * samplerate
+        self.kp = 2.0 / loop
+        self.ki = 1.0 / (loop * loop)
+        self.smooth = SMOOTH_SECONDS * samplerate
+        self.err = None
+        self.integ = 0.0
+        self.ratio = 1.0
+
+    def reset(self):
+        self.err = None
+        self.integ = 0.0
+
+    def update(self, error:float, frames:int, ff:float=1.0) -> float:
+        if self.err is None:
+            self.err = float(error)
+        else:
+            self.err += (error - self.err) * min(1.0, frames / self.smooth)
+        integ = self.integ + self.err * frames
+        corr = self.kp * self.err + self.ki * integ
+        if -MAX_CORRECTION < corr < MAX_CORRECTION:
+            self.integ = integ  # anti-windup: não integra enquanto satura
+        else:
+            corr = MAX_CORRECTION if corr > 0 else -MAX_CORRECTION
+        self.ratio = ff + corr
+        return self.ratio
+
+    def ppm(self) -> float:
+        return (self.ratio - 1.0) * 1e6
+
+class RingReader:
+    """
+    Consumidor de uma RingBuffer cujo produtor roda em outro clock (mic ->
+    saída): mantém a fila num nível alvo lendo um pouco mais ou menos a cada
+    bloco e reamostrando para o tamanho pedido, em vez de descartar ou
+    completar blocos. Só espera o nível alvo na partida (e após um underrun).
+    """
+    def __init__(self, ring, samplerate:int, blocksize:int, target:int):
+        self.ring = ring
+        self.target = target
+        self.producer = ClockRate(samplerate)  # tick no callback de entrada
+        self.ctl = DriftController(samplerate)
+        self.rs = VariableResampler(ring.ch, blocksize)
+        self.primed = False
+
+    def read_into(self, out, gain:float, consumer:ClockRate) -> int:
+        """Soma `len(out)` frames (x gain) em `out`; 0 enquanto a fila enche."""
+        frames = out.shape[0]
+        fill = self.ring.available()
+        if not self.primed:
+            if fill < self.target:
+                return 0
+            self.primed = True
+            self.ctl.reset()
+        ratio = self.ctl.update(fill - self.target, frames, self.producer.rate() / consumer.rate())
+        src = self.rs.prepare(frames, ratio)
+        n = self.ring.read_into(src)
+        if n < src.shape[0]:
+            src[n:].fill(0.0)  # produtor parou (stream do mic travou): volta a encher
+            self.primed = False
+        self.rs.emit(out, gain)
+        return frames
+
+    def stats(self) -> dict:
+        return dict(self.ring.stats(), ppm=self.ctl.ppm(), target=self.target)
+
+class StreamFollower:
+    """
+    Faz um stream de saída (monitor) consumir a mesma fonte no ritmo de
+    outro (principal): o erro é a diferença entre as posições dos dois no
+    mesmo instante, com a do líder extrapolada pelo timestamp do último
+    callback dele, relativa à diferença de quando o acompanhamento começou.
+    """
+    def __init__(self, samplerate:int, blocksize:int, ch:int):
+        self.clock = ClockRate(samplerate)
+        self.ctl = DriftController(samplerate)
+        self.rs = VariableResampler(ch, blocksize)
+        self.consumed = 0     # frames de origem lidos pelo seguidor
+        self._leader = None
+        self._offset = 0.0
+
+    def prepare(self, frames:int, leader:ClockRate|None, t:float):
+        """View [n, ch] zerada com os frames de origem deste bloco, a preencher antes de `emit`."""
+        self.clock.tick(frames, t)
+        if leader is None or not leader.running:
+            ratio = 1.0
+            self._leader = None
+        else:
+            diff = leader.position(t) - self.consumed
+            if leader is not self._leader:  # líder novo (stream reiniciado): nova referência
+                self._leader = leader
+                self._offset = diff
+                self.ctl.reset()
+            ratio = self.ctl.update(diff - self._offset, frames, leader.rate() / self.clock.rate())
+        src = self.rs.prepare(frames, ratio)
+        src.fill(0.0)
+        self.consumed += src.shape[0]
+        return src
+
+    def emit(self, out, gain:float=1.0):
+        self.rs.emit(out, gain)
+
+    def ppm(self) -> float:
+        return self.ctl.ppm()
@@ -32,17 +32,21 @@ def to_pynput_combo(hk: str) -> str:
 class HotkeyManager:
     def __init__(self):
         self.listener = None
+        self.bound_paths = set()  # paths com hotkey ativa (fixados no cache)
 
     def rebuild(self, entries, play_callback, conflict_cb=None, error_cb=None):
         self.stop()
         mapping = {}
         conflicts = []
+        bound = set()
         for idx, it in enumerate(entries):
             hk = norm_hotkey(it.get("hotkey") or "")
             if not hk: continue
             if hk in mapping:
                 conflicts.append(hk); continue
             mapping[to_pynput_combo(hk)] = (lambda idx=idx: play_callback(idx))
+            if it.get("path"): bound.add(it["path"])
+        self.bound_paths = bound
         if conflicts and conflict_cb:
             conflict_cb(sorted(set(conflicts)))
         if not mapping:
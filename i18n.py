@@ -26,10 +26,13 @@ TRANSLATIONS = {
         "add_files_filter": "Áudios (*.mp3 *.wav *.ogg *.flac *.m4a);;Todos (*)",
         "adding_files": "Adicionando arquivos...",
         "added_n": "Adicionados {n}/{total}",
+        "probed_n": "Lendo metadados {n}/{total}",
 
         "cant_output": "Selecione um dispositivo de saída válido.",
         "playing": "Tocando: {name}",
         "play_error": "Falha ao tocar \"{path}\": {err}",
+        "cache_stats": "Cache: {mb} MB · {rate}% acertos",
+        "cache_stats_tip": "Acertos: {hits} · Disco: {disk} · Decodificações: {misses} · Despejos: {evictions}\nPrimeiros frames p50/p95: {p50} / {p95} ms",
 
         "preset_save_title": "Salvar preset do Finoboard",
         "list_empty": "A lista está vazia.",
@@ -54,6 +57,13 @@ TRANSLATIONS = {
         "tip_rename": "Renomear (✎)",
         "tip_clear": "Limpar hotkey (🧹)",
         "tip_delete": "Excluir (✖)",
+        "tip_pad": "Modo de disparo / grupo de corte",
+        "mode_restart": "Reiniciar ao tocar de novo",
+        "mode_overlap": "Sobrepor",
+        "mode_ignore": "Ignorar enquanto toca",
+        "choke_group": "Grupo de corte",
+        "choke_none": "Nenhum",
+        "choke_n": "Grupo {n}",
 
         "rename_title": "Renomear",
         "rename_prompt": "Novo nome para o áudio:",
@@ -85,10 +95,13 @@ TRANSLATIONS = {
         "add_files_filter": "Audio (*.mp3 *.wav *.ogg *.flac *.m4a);;All (*)",
         "adding_files": "Adding files...",
         "added_n": "Added {n}/{total}",
+        "probed_n": "Reading metadata {n}/{total}",
 
         "cant_output": "Select a valid output device.",
         "playing": "Playing: {name}",
         "play_error": "Failed to play \"{path}\": {err}",
+        "cache_stats": "Cache: {mb} MB · {rate}% hits",
+        "cache_stats_tip": "Hits: {hits} · Disk: {disk} · Decodes: {misses} · Evictions: {evictions}\nFirst frames p50/p95: {p50} / {p95} ms",
 
         "preset_save_title": "Save Finoboard preset",
         "list_empty": "List is empty.",
@@ -113,6 +126,13 @@ TRANSLATIONS = {
         "tip_rename": "Rename (✎)",
         "tip_clear": "Clear hotkey (🧹)",
         "tip_delete": "Delete (✖)",
+        "tip_pad": "Play mode / choke group",
+        "mode_restart": "Restart on retrigger",
+        "mode_overlap": "Overlap",
+        "mode_ignore": "Ignore while playing",
+        "choke_group": "Choke group",
+        "choke_none": "None",
+        "choke_n": "Group {n}",
 
         "rename_title": "Rename",
         "rename_prompt": "New name for the audio:",
@@ -144,10 +164,13 @@ TRANSLATIONS = {
         "add_files_filter": "Audio (*.mp3 *.wav *.ogg *.flac *.m4a);;Todos (*)",
         "adding_files": "Agregando archivos...",
         "added_n": "Agregados {n}/{total}",
+        "probed_n": "Leyendo metadatos {n}/{total}",
 
         "cant_output": "Seleccione un dispositivo de salida válido.",
         "playing": "Reproduciendo: {name}",
         "play_error": "Error al reproducir \"{path}\": {err}",
+        "cache_stats": "Caché: {mb} MB · {rate}% aciertos",
+        "cache_stats_tip": "Aciertos: {hits} · Disco: {disk} · Decodificaciones: {misses} · Desalojos: {evictions}\nPrimeros frames p50/p95: {p50} / {p95} ms",
 
         "preset_save_title": "Guardar preset de Finoboard",
         "list_empty": "La lista está vacía.",
@@ -172,6 +195,13 @@ TRANSLATIONS = {
         "tip_rename": "Renombrar (✎)",
         "tip_clear": "Limpiar hotkey (🧹)",
         "tip_delete": "Eliminar (✖)",
+        "tip_pad": "Modo de disparo / grupo de corte",
+        "mode_restart": "Reiniciar al volver a tocar",
+        "mode_overlap": "Superponer",
+        "mode_ignore": "Ignorar mientras suena",
+        "choke_group": "Grupo de corte",
+        "choke_none": "Ninguno",
+        "choke_n": "Grupo {n}",
 
         "rename_title": "Renombrar",
         "rename_prompt": "Nuevo nombre para el audio:",
@@ -203,10 +233,13 @@ TRANSLATIONS = {
         "add_files_filter": "オーディオ (*.mp3 *.wav *.ogg *.flac *.m4a);;すべて (*)",
         "adding_files": "追加中...",
         "added_n": "{total} 中 {n} を追加",
+        "probed_n": "{total} 中 {n} のメタデータを読み込み中",
 
         "cant_output": "有効な出力デバイスを選択してください。",
         "playing": "再生中: {name}",
         "play_error": "再生に失敗 \"{path}\": {err}",
+        "cache_stats": "キャッシュ: {mb} MB · ヒット率 {rate}%",
+        "cache_stats_tip": "ヒット: {hits} · ディスク: {disk} · デコード: {misses} · 追い出し: {evictions}\n最初のフレーム p50/p95: {p50} / {p95} ms",
 
         "preset_save_title": "Finoboard プリセットの保存",
         "list_empty": "リストは空です。",
@@ -231,6 +264,13 @@ TRANSLATIONS = {
         "tip_rename": "名前を変更 (✎)",
         "tip_clear": "ホットキーをクリア (🧹)",
         "tip_delete": "削除 (✖)",
+        "tip_pad": "再生モード / チョークグループ",
+        "mode_restart": "再トリガーで最初から",
+        "mode_overlap": "重ねて再生",
+        "mode_ignore": "再生中は無視",
+        "choke_group": "チョークグループ",
+        "choke_none": "なし",
+        "choke_n": "グループ {n}",
 
         "rename_title": "名前の変更",
         "rename_prompt": "音声の新しい名前:",
@@ -262,10 +302,13 @@ TRANSLATIONS = {
         "add_files_filter": "音频 (*.mp3 *.wav *.ogg *.flac *.m4a);;所有 (*)",
         "adding_files": "正在添加文件...",
         "added_n": "已添加 {n}/{total}",
+        "probed_n": "正在读取元数据 {n}/{total}",
 
         "cant_output": "请选择有效的输出设备。",
         "playing": "正在播放: {name}",
         "play_error": "播放失败 \"{path}\": {err}",
+        "cache_stats": "缓存: {mb} MB · 命中率 {rate}%",
+        "cache_stats_tip": "命中: {hits} · 磁盘: {disk} · 解码: {misses} · 淘汰: {evictions}\n首帧 p50/p95: {p50} / {p95} ms",
 
         "preset_save_title": "保存 Finoboard 预设",
         "list_empty": "列表为空。",
@@ -290,6 +333,13 @@ TRANSLATIONS = {
         "tip_rename": "重命名 (✎)",
         "tip_clear": "清除热键 (🧹)",
         "tip_delete": "删除 (✖)",
+        "tip_pad": "播放模式 / 互斥组",
+        "mode_restart": "再次触发时重新开始",
+        "mode_overlap": "叠加播放",
+        "mode_ignore": "播放中忽略",
+        "choke_group": "互斥组",
+        "choke_none": "无",
+        "choke_n": "组 {n}",
 
         "rename_title": "重命名",
         "rename_prompt": "音频的新名称：",
@@ -0,0 +1,147 @@
+import os, json, threading
+import concurrent.futures
+from decoders import probe_audio
+
+# sondagens simultâneas na importação (ffprobe é um processo por arquivo)
+PROBE_WORKERS = 4
+# custo relativo de decodificar por amostra: PCM só copia, o resto decodifica de fato
+PCM_COST = 1.0
+CODEC_COST = 4.0
+
+class LibraryIndex:
+    """
+    Índice persistente (JSON) de metadados por arquivo: duração, rate nativo,
+    canais, codec e tamanho. Preenchido uma vez na importação; uma entrada só
+    vale enquanto o tamanho e o mtime do arquivo forem os mesmos.
+    """
+    def __init__(self, path:str|None=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False    # mudou desde a última gravação
+        self._saving = False   # gravação em segundo plano em andamento
+        self._entries = self._read()  # path -> {"size", "mtime", "duration", "sr", "channels", "codec"}
+
+    def _read(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return {p: e for p, e in raw.items() if isinstance(e, dict) and {"size", "mtime", "duration"} <= e.keys()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = dict(self._entries)
+            self._dirty = False
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def get(self, path:str, st=None):
+        """Entrada do arquivo ou None (ausente ou desatualizada). `st`: stat já feito pelo chamador."""
+        e = self._entries.get(path)
+        if e is None:
+            return None
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+        if e["size"] != st.st_size or e["mtime"] != st.st_mtime:
+            return None
+        return e
+
+    def peek(self, path:str):
+        """Entrada gravada sem conferir o arquivo (sem stat): ordem e exibição na UI."""
+        return self._entries.get(path)
+
+    def duration(self, path:str, st=None):
+        """Com `st` (quem vai decodificar) a entrada é validada; sem, é só a gravada (sem syscall)."""
+        e = self.get(path, st) if st is not None else self.peek(path)
+        return e["duration"] if e else None
+
+    def cost(self, path:str) -> float:
+        """Custo estimado de decodificar (amostras x peso do codec); sem entrada vai para o fim."""
+        e = self.peek(path)
+        if e is None:
+            return float("inf")
+        weight = PCM_COST if e.get("codec", "").startswith(("pcm_", "wav/pcm")) else CODEC_COST
+        return e["duration"] * e.get("sr", 48000) * e.get("channels", 2) * weight
+
+    def missing(self, paths):
+        return [p for p in paths if self.get(p) is None]
+
+    def forget(self, paths):
+        """Remove as entradas e agenda a gravação do índice (fora da thread do chamador)."""
+        with self._lock:
+            for p in paths:
+                if self._entries.pop(p, None) is not None:
+                    self._dirty = True
+            start = bool(self.path) and self._dirty and not self._saving
+            if start:
+                self._saving = True
+        if start:
+            threading.Thread(target=self._save_bg, daemon=True).start()
+
+    def _save_bg(self):
+        # regrava enquanto houver mudança que chegou depois da cópia feita em save()
+        try:
+            while True:
+                self.save()
+                with self._lock:
+                    if not self._dirty:
+                        return
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def probe_many(self, paths, workers:int=PROBE_WORKERS, cancelled=None, on_probed=None):
+        """
+        Passada única em lote sobre os arquivos que ainda não estão no índice
+        (cabeçalhos apenas, nada é decodificado); grava o índice uma vez no fim.
+        on_probed(path, entrada|None) é chamado a cada arquivo, na thread do chamador.
+        """
+        todo = self.missing(paths)
+        if not todo:
+            return 0
+        done = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            futures = {ex.submit(self._probe_one, p): p for p in todo}
+            try:
+                for fut in concurrent.futures.as_completed(futures):
+                    p = futures[fut]
+                    try:
+                        e = fut.result()
+                    except Exception:
+                        e = None
+                    if e is not None:
+                        with self._lock:
+                            self._entries[p] = e
+                    done += 1
+                    if on_probed is not None:
+                        on_probed(p, e)
+                    if cancelled is not None and cancelled():
+                        break
+            finally:
+                for fut in futures:
+                    fut.cancel()
+        self.save()
+        return done
+
+    @staticmethod
+    def _probe_one(path):
+        st = os.stat(path)
+        info = probe_audio(path)
+        if info is None:
+            return None
+        return dict(info, size=st.st_size, mtime=st.st_mtime)
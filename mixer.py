@@ -1,14 +1,36 @@
 import numpy as np
 import sounddevice as sd
-import collections
 import threading
+import time
+from resampler import resample, QUALITY_FAST, VariableResampler
+from drift import ClockRate, RingReader, StreamFollower
+from ring_buffer import RingBuffer
+from voice_table import Voice, VoiceTable, MAIN, MON
+
+# mic -> saída: capacidade da fila e nível alvo mantido pela compensação de deriva (em blocos)
+MIC_RING_BLOCKS = 16
+MIC_TARGET_BLOCKS = 3
+# modos de disparo por pad: reinicia, sobrepõe ou ignora enquanto toca
+MODE_RESTART = "restart"
+MODE_OVERLAP = "overlap"
+MODE_IGNORE = "ignore"
+PLAY_MODES = (MODE_RESTART, MODE_OVERLAP, MODE_IGNORE)
+# limite global de vozes e quem perde a vaga quando ele estoura
+MAX_VOICES = 32
+STEAL_OLDEST = "oldest"
+STEAL_QUIETEST = "quietest"
+# fade de saída das vozes cortadas (roubo, choke, restart): evita o clique
+FADE_FRAMES = 256
+# limites do mix como arrays 0-d (ver VoiceTable._n)
+_CEIL = np.full((), 1.0, dtype=np.float32)
+_FLOOR = np.full((), -1.0, dtype=np.float32)
 
 class Mixer:
     """
     Saída principal (VB-Cable): mic + clipes
     Monitor local (alto-falantes): apenas clipes (sem mic) para evitar eco.
     """
-    def __init__(self, samplerate=48000, channels=2, blocksize=256):
+    def __init__(self, samplerate=48000, channels=2, blocksize=256, max_voices=MAX_VOICES, steal=STEAL_OLDEST):
         self.sr = samplerate
         self.ch = channels
         self.blocksize = blocksize
@@ -22,10 +44,21 @@ class Mixer:
         self._mon_stream = None
 
         self._lock = threading.Lock()
-        # cada clipe mantém dois cursores: principal e monitor
-        self._clips = []  # {"data": np.ndarray [N,2], "pos_main":int, "pos_mon":int}
-        self._mic_queue = collections.deque()
-        self._mic_queue_frames = 0
+        # no máximo max_voices tocando (+ as que estão no fade): custo por callback limitado.
+        # cada voz mantém dois cursores (principal e monitor) na tabela
+        self.max_voices = max(1, max_voices)
+        self.steal = steal
+        self._voices = VoiceTable(2 * self.max_voices)
+        self._fade = np.linspace(1.0, 0.0, FADE_FRAMES, dtype=np.float32).reshape(-1, 1)
+        # mic fora da trava: fila SPSC entre o callback de entrada e o de saída,
+        # lida no ritmo do clock da saída (reamostragem adaptativa, sem descartar blocos)
+        self._mic_reader = None
+        # clocks independentes: a saída principal é a referência; o monitor a segue
+        self._main_clock = None
+        self._mon_follow = None
+        # buffers de trabalho por stream ("main"/"mon"): o render não aloca por callback
+        self._scratch_bufs = {}
+        self._stack_views = {}  # views da pilha das vozes por tamanho de bloco (ver _stack)
 
         self.gain = 1.0       # ganho clipes (principal)
         self.mic_gain = 1.0   # ganho mic   (principal)
@@ -85,21 +118,14 @@ class Mixer:
         except Exception:
             ch_in = 1
 
+        ring = RingBuffer(self.blocksize * MIC_RING_BLOCKS, self.ch)
+        reader = RingReader(ring, self.sr, self.blocksize, self.blocksize * MIC_TARGET_BLOCKS)
+
         def in_cb(indata, frames, time_info, status):
             if status: pass
             if indata is None: return
-            mic = indata.astype(np.float32, copy=False)
-            if mic.shape[1] == 1:
-                mic = np.repeat(mic, 2, axis=1)
-            elif mic.shape[1] > 2:
-                mic = mic[:, :2]
-            with self._lock:
-                self._mic_queue.append(mic.copy())
-                self._mic_queue_frames += mic.shape[0]
-                max_frames = self.blocksize * 5
-                while self._mic_queue_frames > max_frames and len(self._mic_queue) > 1:
-                    old = self._mic_queue.popleft()
-                    self._mic_queue_frames -= old.shape[0]
+            reader.producer.tick(frames, time.perf_counter())
+            ring.write(indata)  # mono é duplicado na cópia; sem trava e sem alocar
 
         self._in_stream = sd.InputStream(
             device=self.in_dev,
@@ -110,6 +136,7 @@ class Mixer:
             latency='low',
             callback=in_cb
         )
+        self._mic_reader = reader
         self._in_stream.start()
 
     def _stop_input(self):
@@ -118,57 +145,116 @@ class Mixer:
                 self._in_stream.stop(); self._in_stream.close()
         finally:
             self._in_stream = None
-            with self._lock:
-                self._mic_queue.clear()
-                self._mic_queue_frames = 0
+            self._mic_reader = None  # o callback de saída para de ler na próxima volta
+
+    def mic_stats(self) -> dict:
+        """Fila do mic (overruns/underruns/descartes) e correção de deriva em ppm (vazio sem mic)."""
+        reader = self._mic_reader
+        return reader.stats() if reader is not None else {}
+
+    def monitor_stats(self) -> dict:
+        """Correção de deriva do monitor em relação à saída principal, em ppm (vazio sem monitor)."""
+        follow = self._mon_follow
+        return {"ppm": follow.ppm()} if follow is not None else {}
+
+    # ----- Render (sem alocação de buffers de áudio por callback) -----
+    def _scratch(self, name, frames):
+        """
+        Buffer de mix do stream `name`, reutilizado a cada callback; só cresce
+        se o device pedir um bloco maior que o visto até aqui.
+        """
+        buf = self._scratch_bufs.get(name)
+        if buf is None or buf.shape[0] < frames:
+            buf = self._scratch_bufs[name] = np.zeros((max(frames, self.blocksize), self.ch), dtype=np.float32)
+        mix = buf[:frames]
+        mix.fill(0.0)
+        return mix
+
+    def _stack(self, frames):
+        """
+        Pilha [vozes, frames*ch] contígua (o np.dot não copia): views [frames, ch]
+        de cada linha, das k primeiras linhas para cada k e o acumulador (achatado
+        e [frames, ch]), usados sob a trava. Montadas na primeira vez que o tamanho
+        aparece: o monitor alterna entre poucos (compensação de deriva).
+        """
+        views = self._stack_views.get(frames)
+        if views is None:
+            cap = self._voices.capacity
+            width = frames * self.ch
+            buf = self._scratch_bufs.get("stack")
+            if buf is None or buf.shape[0] < cap * width:
+                # o monitor pode ler alguns frames a mais por bloco
+                size = cap * VariableResampler.max_input(max(frames, self.blocksize)) * self.ch
+                buf = self._scratch_bufs["stack"] = np.zeros(size, dtype=np.float32)
+                self._stack_views.clear()
+            stack = buf[:cap * width].reshape(cap, width)
+            acc = np.zeros(width, dtype=np.float32)
+            views = self._stack_views[frames] = ([line.reshape(frames, self.ch) for line in stack],
+                                                 [stack[:k] for k in range(cap + 1)],
+                                                 acc, acc.reshape(frames, self.ch))
+        return views
+
+    def _render_voices(self, c, mix, frames, gain, track_level=False):
+        """
+        Mixa o próximo trecho de todas as vozes no cursor `c`: cada trecho vai
+        para uma linha da pilha (int16 convertido na cópia, fade aplicado na
+        linha) e um único produto escalar aplica os ganhos de todas de uma vez.
+        Sem alocação: só views montadas de antemão e escritas com out=.
+        """
+        tbl = self._voices
+        tbl.refresh_streams()
+        k = tbl.advance(c, frames, FADE_FRAMES)
+        if not k:
+            return
+        lines, heads, acc, acc2d = self._stack(frames)
+        voices, live, starts, ends, ramps = tbl.voices, tbl.live, tbl.starts, tbl.ends, tbl.ramps
+        for j in range(k):
+            row = lines[j]
+            p, e = starts[j], ends[j]
+            n = e - p
+            if n <= 0:
+                row.fill(0.0)  # cursor terminado ou fonte ainda sem frames
+                continue
+            v = voices[live[j]]
+            data = v.data if v.src is None else v.src.data
+            if n < frames:
+                np.copyto(row[:n], data[p:e])  # conversão direta, sem o buffer interno do ufunc
+                row[n:].fill(0.0)
+            else:
+                np.copyto(row, data[p:e])
+            f = ramps[j]
+            if f >= 0:
+                np.multiply(row[:n], self._fade[f:f + n], out=row[:n])
+        gains = tbl.gains(k, gain)
+        np.dot(gains, heads[k], out=acc)
+        np.add(mix, acc2d, out=mix)
+        if track_level:
+            tbl.track_levels(k, heads[k])
 
     # ----- Output principal (mix mic + clipes) -----
     def _start_output(self):
+        self._scratch("main", self.blocksize)  # aloca fora do callback
+        clock = ClockRate(self.sr)
+
         def out_cb(outdata, frames, time_info, status):
             if status: pass
-            mix = np.zeros((frames, self.ch), dtype=np.float32)
+            clock.tick(frames, time.perf_counter())
+            mix = self._scratch("main", frames)
+
+            # mic: da fila para o mix (que está zerado), fora da trava, reamostrado
+            # para acompanhar a deriva entre o clock do mic e o desta saída
+            reader = self._mic_reader
+            if reader is not None:
+                reader.read_into(mix, self.mic_gain, clock)
 
             with self._lock:
-                # mic
-                need = frames
-                chunks = []
-                while need > 0 and self._mic_queue:
-                    blk = self._mic_queue[0]
-                    if blk.shape[0] <= need:
-                        chunks.append(blk)
-                        self._mic_queue.popleft()
-                        self._mic_queue_frames -= blk.shape[0]
-                        need -= blk.shape[0]
-                    else:
-                        chunks.append(blk[:need])
-                        self._mic_queue[0] = blk[need:]
-                        self._mic_queue_frames -= need
-                        need = 0
-                if chunks:
-                    mic = np.vstack(chunks)
-                    if mic.shape[0] < frames:
-                        pad = np.zeros((frames - mic.shape[0], 2), dtype=np.float32)
-                        mic = np.vstack([mic, pad])
-                    mix += mic * self.mic_gain
-
-                # clipes (cursor principal)
-                to_remove = []
-                for i, clip in enumerate(self._clips):
-                    data = clip["data"]; pos = clip["pos_main"]
-                    end = min(pos + frames, data.shape[0])
-                    chunk = data[pos:end]
-                    if chunk.shape[0] < frames:
-                        pad = np.zeros((frames - chunk.shape[0], data.shape[1]), dtype=data.dtype)
-                        chunk = np.vstack([chunk, pad])
-                    mix += chunk * self.gain
-                    clip["pos_main"] = end
-                    # remoção só quando AMBOS terminaram (principal e monitor)
-                    if clip["pos_main"] >= data.shape[0] and clip["pos_mon"] >= data.shape[0]:
-                        to_remove.append(i)
-                for idx in reversed(to_remove):
-                    self._clips.pop(idx)
-
-            np.clip(mix, -1.0, 1.0, out=mix)
+                self._render_voices(MAIN, mix, frames, self.gain, self.steal == STEAL_QUIETEST)
+                # remoção só quando AMBOS terminaram (principal e monitor, se ativo);
+                # clipe em streaming só termina depois do EOF do decoder
+                self._voices.collect(both=self._mon_stream is not None)
+
+            np.minimum(mix, _CEIL, out=mix)
+            np.maximum(mix, _FLOOR, out=mix)
             outdata[:] = mix
 
         self._out_stream = sd.OutputStream(
@@ -180,6 +266,7 @@ class Mixer:
             latency='low',
             callback=out_cb
         )
+        self._main_clock = clock
         self._out_stream.start()
 
     def _stop_output(self):
@@ -188,24 +275,25 @@ class Mixer:
                 self._out_stream.stop(); self._out_stream.close()
         finally:
             self._out_stream = None
+            self._main_clock = None
 
     # ----- Monitor local (somente clipes) -----
     def _start_monitor(self):
+        self._scratch("mon", self.blocksize)
+        follow = StreamFollower(self.sr, self.blocksize, self.ch)
+
         def mon_cb(outdata, frames, time_info, status):
             if status: pass
-            mix = np.zeros((frames, self.ch), dtype=np.float32)
+            mix = self._scratch("mon", frames)
+            # os cursores do monitor andam no ritmo da saída principal: renderiza
+            # os frames de origem que a deriva pede e reamostra para o bloco do device
+            src = follow.prepare(frames, self._main_clock, time.perf_counter())
             with self._lock:
-                for clip in self._clips:
-                    data = clip["data"]; pos = clip["pos_mon"]
-                    end = min(pos + frames, data.shape[0])
-                    chunk = data[pos:end]
-                    if chunk.shape[0] < frames:
-                        pad = np.zeros((frames - chunk.shape[0], data.shape[1]), dtype=data.dtype)
-                        chunk = np.vstack([chunk, pad])
-                    mix += chunk * self.monitor_gain
-                    clip["pos_mon"] = end
+                self._render_voices(MON, src, src.shape[0], self.monitor_gain)
                 # remoção ocorre no callback principal quando ambos terminam
-            np.clip(mix, -1.0, 1.0, out=mix)
+            follow.emit(mix)
+            np.minimum(mix, _CEIL, out=mix)
+            np.maximum(mix, _FLOOR, out=mix)
             outdata[:] = mix
 
         self._mon_stream = sd.OutputStream(
@@ -217,6 +305,7 @@ class Mixer:
             latency='low',
             callback=mon_cb
         )
+        self._mon_follow = follow
         self._mon_stream.start()
 
     def _stop_monitor(self):
@@ -225,23 +314,70 @@ class Mixer:
                 self._mon_stream.stop(); self._mon_stream.close()
         finally:
             self._mon_stream = None
+            self._mon_follow = None
+
+    # ----- Vozes -----
+    def _start_voice(self, voice, scale, mode) -> bool:
+        tbl = self._voices
+        with self._lock:
+            if voice.pad is not None and mode != MODE_OVERLAP:
+                same = tbl.find(pad=voice.pad)
+                if same and mode == MODE_IGNORE:
+                    return False
+                for i in same:
+                    tbl.release(i, FADE_FRAMES)  # restart
+            if voice.choke is not None:
+                for i in tbl.find(choke=voice.choke):
+                    tbl.release(i, FADE_FRAMES)
+            playing = tbl.playing()
+            while playing.sum() >= self.max_voices:
+                victim = tbl.pick(playing, tbl.level if self.steal == STEAL_QUIETEST else tbl.order)
+                tbl.release(victim, FADE_FRAMES)
+                playing[victim] = False
+            # vozes em fade também ocupam slot: sem slot livre, a mais antiga corta seco
+            if not tbl.free:
+                tbl.remove(tbl.pick(tbl.used, tbl.order))
+            tbl.add(voice, scale)
+            return True
+
+    def voice_count(self) -> int:
+        with self._lock:
+            return int(self._voices.playing().sum())
 
     # ----- Controle -----
-    def play_clip(self, data, sr):
-        if sr != self.sr:
-            raise RuntimeError(f"SR diferente ({sr} vs {self.sr}). Ajuste o cache para {self.sr}.")
+    def play_clip(self, data, sr, gain:float=1.0, pad=None, mode:str=MODE_OVERLAP, choke=None) -> bool:
+        """
+        `gain`: ganho da voz (ex.: normalização), somado ao multiply que já existe.
+        `pad`/`mode`: o que fazer se o mesmo pad já está tocando (PLAY_MODES);
+        `choke`: iniciar a voz corta as outras do mesmo grupo. False = ignorado.
+        """
+        if not isinstance(data, np.ndarray):
+            # fonte em streaming (StreamingClip): o voice segue o decoder
+            if sr != self.sr:
+                raise RuntimeError(f"SR diferente ({sr} vs {self.sr}). Ajuste o cache para {self.sr}.")
+            if data.ch != 2:
+                raise RuntimeError(f"Streaming com {data.ch} canais; o mixer espera 2.")
+            return self._start_voice(Voice(None, data, pad, choke), data.scale * gain, mode)
         if data.ndim == 1:
             data = np.stack([data, data], axis=1)
         elif data.shape[1] == 1:
             data = np.repeat(data, 2, axis=1)
         elif data.shape[1] > 2:
             data = data[:, :2]
-        with self._lock:
-            self._clips.append({"data": data.astype(np.float32, copy=False), "pos_main": 0, "pos_mon": 0})
+        if sr != self.sr:
+            # prévia: reamostragem rápida (linear); o cache deriva a variante boa
+            scale = 1.0 / 32768.0 if data.dtype == np.int16 else 1.0
+            data = resample(data.astype(np.float32) * np.float32(scale), sr, self.sr, QUALITY_FAST)
+        if data.dtype == np.int16:
+            scale = 1.0 / 32768.0  # armazenamento compacto do cache
+        else:
+            data = data.astype(np.float32, copy=False)
+            scale = 1.0
+        return self._start_voice(Voice(data, None, pad, choke), scale * gain, mode)
 
     def stop_all(self):
         with self._lock:
-            self._clips.clear()
+            self._voices.clear()
 
     def stop(self):
         self._stop_input()
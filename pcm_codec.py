@@ -0,0 +1,42 @@
+import zlib
+import numpy as np
+
+# nível do zlib: 1 já pega quase todo o ganho do delta e descomprime rápido
+ZLIB_LEVEL = 1
+
+class CompressedPCM:
+    """
+    PCM int16 comprimido sem perdas: delta por canal (wrap em int16), bytes
+    separados em planos (alto/baixo) e zlib. Descomprime em alguns ms por
+    segundo de áudio, bem mais rápido que decodificar ou ler de um disco lento.
+    """
+    __slots__ = ("blob", "frames", "ch", "nbytes")
+
+    def __init__(self, blob:bytes, frames:int, ch:int):
+        self.blob = blob
+        self.frames = frames
+        self.ch = ch
+        self.nbytes = len(blob)
+
+    @property
+    def pcm_bytes(self) -> int:
+        return self.frames * self.ch * 2
+
+def compress_pcm(samples:np.ndarray, level:int=ZLIB_LEVEL) -> CompressedPCM:
+    if samples.dtype != np.int16:
+        raise ValueError("compress_pcm espera int16")
+    x = np.ascontiguousarray(samples)
+    delta = np.empty_like(x)
+    delta[:1] = x[:1]
+    np.subtract(x[1:], x[:-1], out=delta[1:])  # int16: estoura e volta (reversível)
+    b = delta.view(np.uint8).reshape(-1)
+    planes = np.concatenate([b[0::2], b[1::2]])  # byte 0 de todas as amostras, depois o byte 1
+    return CompressedPCM(zlib.compress(planes, level), x.shape[0], x.shape[1])
+
+def decompress_pcm(c:CompressedPCM) -> np.ndarray:
+    raw = np.frombuffer(zlib.decompress(c.blob), dtype=np.uint8)
+    half = raw.shape[0] // 2
+    b = np.empty(raw.shape[0], dtype=np.uint8)
+    b[0::2] = raw[:half]
+    b[1::2] = raw[half:]
+    return np.cumsum(b.view(np.int16).reshape(c.frames, c.ch), axis=0, dtype=np.int16)
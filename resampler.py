@@ -0,0 +1,287 @@
+import math
+import numpy as np
+
+# níveis de qualidade: "fast" (linear, prévias/mixer), "medium" e "high" (cache)
+QUALITY_FAST = "fast"
+QUALITY_MEDIUM = "medium"
+QUALITY_HIGH = "high"
+# polifásico: (zero-crossings de cada lado, beta da janela Kaiser)
+_SINC_PARAMS = {
+    QUALITY_MEDIUM: (8, 6.0),
+    QUALITY_HIGH: (24, 8.6),
+}
+# acima disso as fases são quantizadas (razões "primas" como 44100 -> 48001)
+MAX_PHASES = 1024
+# saídas calculadas por vez (limita o gather [B, taps] na memória)
+EMIT_BLOCK = 4096
+# razão variável (deriva de clock): desvio máximo de 1.0 aceito por VariableResampler
+MAX_RATIO_DEVIATION = 0.01
+# coeficientes do Catmull-Rom como arrays 0-d (ver VoiceTable._n)
+_HALF = np.full((), 0.5, dtype=np.float32)
+_ONE = np.full((), 1.0, dtype=np.float32)
+_THREE_HALVES = np.full((), 1.5, dtype=np.float32)
+_FIVE_HALVES = np.full((), 2.5, dtype=np.float32)
+
+class LinearResampler:
+    """
+    Reamostragem em blocos com estado entre as chamadas (interpolação linear).
+    Serve para decodificar e reamostrar ao mesmo tempo, sem esperar o EOF.
+    """
+    def __init__(self, sr_in:int, sr_out:int, ch:int):
+        self.sr_in = sr_in
+        self.sr_out = sr_out
+        self.step = sr_in / sr_out
+        self._buf = np.zeros((0, ch), dtype=np.float32)
+        self._t = 0.0  # posição (em frames de entrada, relativa a _buf) da próxima saída
+
+    def _emit(self, count:int) -> np.ndarray:
+        t = self._t + self.step * np.arange(count)
+        i = t.astype(np.int64)
+        np.minimum(i, self._buf.shape[0] - 1, out=i)
+        j = np.minimum(i + 1, self._buf.shape[0] - 1)
+        f = (t - i).astype(np.float32)[:, None]
+        out = self._buf[i] * (1.0 - f)
+        out += self._buf[j] * f
+        return out
+
+    def process(self, x:np.ndarray) -> np.ndarray:
+        buf = np.concatenate([self._buf, x.astype(np.float32, copy=False)]) if self._buf.shape[0] else x.astype(np.float32)
+        self._buf = buf
+        last = buf.shape[0] - 1
+        count = math.ceil((last - self._t) / self.step) if last > self._t else 0
+        out = self._emit(count) if count else buf[:0]
+        t = self._t + self.step * count
+        drop = min(int(t), buf.shape[0])
+        self._buf = buf[drop:]
+        self._t = t - drop
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Frames finais (a última posição coincide com o fim da entrada)."""
+        if self._buf.shape[0] == 0:
+            return self._buf
+        last = self._buf.shape[0] - 1
+        count = int(math.floor((last - self._t) / self.step)) + 1 if last >= self._t else 0
+        out = self._emit(count) if count else self._buf[:0]
+        self._buf = self._buf[:0]
+        self._t = 0.0
+        return out
+
+def _sinc_bank(up:int, down:int, zero_crossings:int, beta:float):
+    """Banco polifásico [fases, taps] de um sinc janelado (Kaiser), ganho DC = 1."""
+    cutoff = min(1.0, up / down) * 0.97  # fração do Nyquist de entrada (anti-aliasing)
+    half = int(math.ceil(zero_crossings / cutoff))
+    phases = min(up, MAX_PHASES)
+    frac = np.arange(phases, dtype=np.float64)[:, None] / phases
+    x = np.arange(-half + 1, half + 1, dtype=np.float64)[None, :] - frac
+    r = np.clip(x / half, -1.0, 1.0)
+    window = np.i0(beta * np.sqrt(1.0 - r * r)) / np.i0(beta)
+    bank = cutoff * np.sinc(cutoff * x) * window
+    bank /= bank.sum(axis=1, keepdims=True)
+    return bank.astype(np.float32), half
+
+class PolyphaseResampler:
+    """
+    Sinc janelado polifásico, vetorizado em NumPy e com estado entre blocos.
+    A saída n fica na posição de entrada n * down / up (razão racional exata).
+    """
+    def __init__(self, sr_in:int, sr_out:int, ch:int, quality:str=QUALITY_HIGH):
+        g = math.gcd(sr_in, sr_out)
+        self.sr_in = sr_in
+        self.sr_out = sr_out
+        self.up = sr_out // g
+        self.down = sr_in // g
+        self.ch = ch
+        self.bank, self.half = _sinc_bank(self.up, self.down, *_SINC_PARAMS[quality])
+        self._taps = np.arange(-self.half + 1, self.half + 1, dtype=np.int64)
+        # _buf[0] corresponde ao frame de entrada _base (começa com zeros à esquerda)
+        self._buf = np.zeros((self.half - 1, ch), dtype=np.float32)
+        self._base = -(self.half - 1)
+        self._n = 0        # próxima saída
+        self._seen = 0     # frames de entrada recebidos
+
+    def _emit(self, n_end:int) -> np.ndarray:
+        outs = []
+        for n0 in range(self._n, n_end, EMIT_BLOCK):
+            n = np.arange(n0, min(n_end, n0 + EMIT_BLOCK), dtype=np.int64)
+            num = n * self.down
+            center = num // self.up
+            phase = (num % self.up) * self.bank.shape[0] // self.up
+            idx = (center - self._base)[:, None] + self._taps[None, :]   # [B, taps]
+            weights = self.bank[phase]
+            out = np.empty((idx.shape[0], self.ch), dtype=np.float32)
+            for c in range(self.ch):
+                out[:, c] = np.einsum("bt,bt->b", weights, self._buf[:, c][idx])
+            outs.append(out)
+        self._n = n_end
+        return np.concatenate(outs) if outs else np.zeros((0, self.ch), dtype=np.float32)
+
+    def _trim(self):
+        # descarta o que nenhuma saída futura vai usar
+        first = (self._n * self.down) // self.up - self.half + 1
+        drop = max(0, min(first - self._base, self._buf.shape[0]))
+        if drop:
+            self._buf = self._buf[drop:]
+            self._base += drop
+
+    def process(self, x:np.ndarray) -> np.ndarray:
+        self._buf = np.concatenate([self._buf, x.astype(np.float32, copy=False)])
+        self._seen += x.shape[0]
+        # saídas cujo último tap (center + half) já chegou
+        last_center = self._seen - 1 - self.half
+        n_end = (last_center * self.up) // self.down + 1 if last_center >= 0 else 0
+        out = self._emit(max(n_end, self._n))
+        self._trim()
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Completa com zeros à direita e emite até o último frame de entrada."""
+        if self._seen == 0:
+            return np.zeros((0, self.ch), dtype=np.float32)
+        self._buf = np.concatenate([self._buf, np.zeros((self.half, self.ch), dtype=np.float32)])
+        n_end = ((self._seen - 1) * self.up) // self.down + 1
+        out = self._emit(max(n_end, self._n))
+        self._trim()
+        return out
+
+class VariableResampler:
+    """
+    Reamostragem em tempo real com razão ajustável a cada bloco (Catmull-Rom,
+    4 pontos), usada na compensação de deriva de clock. A cada callback
+    `prepare` devolve os frames de entrada a preencher e `emit` soma exatamente
+    `frames` de saída. Buffers e views pré-alocados: não aloca por bloco.
+    Com razão 1.0 a saída é a entrada atrasada em HIST - 1 frames, sem alteração.
+    """
+    HIST = 4  # frames anteriores mantidos para a interpolação
+
+    def __init__(self, ch:int, max_frames:int):
+        self.ch = ch
+        self._x = np.zeros((self.HIST, ch), dtype=np.float32)
+        # escalares do bloco, reescritos com fill() (ver VoiceTable._n)
+        self._ch = np.full((), ch, dtype=np.int64)
+        self._rate = np.zeros((), dtype=np.float64)
+        self._start = np.zeros((), dtype=np.float64)
+        self._gain = np.zeros((), dtype=np.float32)
+        self._alloc(max_frames)
+        self._p = 1.0      # posição (em _x) da próxima saída, sempre em [1, 2)
+        self._frames = 0
+        self._ratio = 1.0
+        self._n = 0
+
+    @staticmethod
+    def max_input(frames:int) -> int:
+        """Frames de entrada que um bloco de `frames` saídas pode pedir."""
+        return int(math.ceil(frames * (1.0 + MAX_RATIO_DEVIATION))) + 2
+
+    def _alloc(self, frames:int):
+        x = np.zeros((self.HIST + self.max_input(frames), self.ch), dtype=np.float32)
+        x[:self.HIST] = self._x[:self.HIST]  # o histórico sobrevive à realocação
+        self._x = x
+        self._head = x[:self.HIST]
+        # x achatado a partir de cada um dos 4 pontos da interpolação
+        self._flat = tuple(x.reshape(-1)[k * self.ch:] for k in range(4))
+        self.max_frames = frames
+        # tudo achatado em frames*ch (amostra a amostra): sem broadcast nos ufuncs
+        size = frames * self.ch
+        self._ramp = np.repeat(np.arange(frames, dtype=np.float64), self.ch)
+        # canal da amostra já recuado um frame: o primeiro dos 4 pontos
+        self._chan = np.tile(np.arange(self.ch, dtype=np.int64) - self.ch, frames)
+        self._t = np.empty(size, dtype=np.float64)
+        self._fl = np.empty(size, dtype=np.float64)
+        self._i = np.empty(size, dtype=np.int64)
+        self._w = np.empty((6, size), dtype=np.float32)  # 4 pesos + 2 temporários
+        self._g = np.empty((4, size), dtype=np.float32)
+        self._blocks = {}  # views por tamanho de bloco (_block)
+        self._cuts = {}    # views por frames de entrada (_cut)
+
+    def _block(self, frames:int):
+        views = self._blocks.get(frames)
+        if views is None:
+            size = frames * self.ch
+            w, g = self._w[:, :size], self._g[:, :size]
+            views = self._blocks[frames] = (self._t[:size], self._fl[:size], self._i[:size],
+                                            self._ramp[:size], self._chan[:size],
+                                            tuple(w), w[:4], tuple(g), g[0].reshape(frames, self.ch))
+        return views
+
+    def _cut(self, n:int):
+        """(entrada [n, ch] a preencher, últimos HIST frames depois dela)."""
+        views = self._cuts.get(n)
+        if views is None:
+            views = self._cuts[n] = (self._x[self.HIST:self.HIST + n], self._x[n:n + self.HIST])
+        return views
+
+    def prepare(self, frames:int, ratio:float) -> np.ndarray:
+        """
+        `ratio` = frames de entrada por frame de saída (limitado a 1 ± MAX_RATIO_DEVIATION).
+        Devolve a view [n, ch] que o chamador preenche antes de `emit`.
+        """
+        ratio = min(max(ratio, 1.0 - MAX_RATIO_DEVIATION), 1.0 + MAX_RATIO_DEVIATION)
+        if frames > self.max_frames:
+            self._alloc(frames)  # raro: o device pediu um bloco maior
+        n = int(self._p + frames * ratio) - 1
+        self._frames, self._ratio, self._n = frames, ratio, n
+        return self._cut(n)[0]
+
+    def emit(self, out:np.ndarray, gain:float=1.0):
+        """Soma em `out` [frames, ch] a saída (x gain) do bloco preparado."""
+        frames, n = self._frames, self._n
+        t, fl, i, ramp, chan, (w0, w1, w2, w3, f, f2), weights, (g0, g1, g2, g3), acc = self._block(frames)
+        self._rate.fill(self._ratio)
+        self._start.fill(self._p)
+        np.multiply(ramp, self._rate, out=t)
+        np.add(t, self._start, out=t)
+        np.floor(t, out=fl)
+        np.copyto(i, fl, casting="unsafe")
+        np.multiply(i, self._ch, out=i)
+        np.add(i, chan, out=i)       # índice da amostra em x achatado
+        np.subtract(t, fl, out=t)    # fração
+        np.copyto(f, t, casting="same_kind")
+        np.multiply(f, f, out=f2)
+        np.multiply(f2, f, out=w3)   # f³ (temporário)
+        np.add(w3, f, out=w0)
+        np.multiply(w0, _HALF, out=w0)
+        np.subtract(f2, w0, out=w0)  # w0 = -0.5f³ + f² - 0.5f
+        np.multiply(w3, _THREE_HALVES, out=w1)
+        np.multiply(f2, _FIVE_HALVES, out=w2)
+        np.subtract(w1, w2, out=w1)
+        np.add(w1, _ONE, out=w1)     # w1 = 1.5f³ - 2.5f² + 1
+        np.subtract(w3, f2, out=w3)
+        np.multiply(w3, _HALF, out=w3)  # w3 = 0.5f³ - 0.5f²
+        np.add(w0, w1, out=w2)
+        np.add(w2, w3, out=w2)
+        np.subtract(_ONE, w2, out=w2)   # pesos somam 1
+        if gain != 1.0:
+            self._gain.fill(gain)
+            np.multiply(weights, self._gain, out=weights)
+        x0, x1, x2, x3 = self._flat
+        x0.take(i, out=g0, mode="clip")
+        x1.take(i, out=g1, mode="clip")
+        x2.take(i, out=g2, mode="clip")
+        x3.take(i, out=g3, mode="clip")
+        np.multiply(g0, w0, out=g0)
+        np.multiply(g1, w1, out=g1)
+        np.multiply(g2, w2, out=g2)
+        np.multiply(g3, w3, out=g3)
+        np.add(g0, g1, out=g0)
+        np.add(g2, g3, out=g2)
+        np.add(g0, g2, out=g0)
+        np.add(out, acc, out=out)
+        # histórico = últimos HIST frames de entrada; posição volta para [1, 2)
+        np.copyto(self._head, self._cut(n)[1])
+        self._p += frames * self._ratio - n
+
+def make_resampler(sr_in:int, sr_out:int, ch:int, quality:str=QUALITY_HIGH):
+    """Reamostrador em blocos no nível de qualidade pedido."""
+    if quality == QUALITY_FAST:
+        return LinearResampler(sr_in, sr_out, ch)
+    if quality not in _SINC_PARAMS:
+        raise ValueError(f"qualidade de reamostragem desconhecida: {quality}")
+    return PolyphaseResampler(sr_in, sr_out, ch, quality)
+
+def resample(x:np.ndarray, sr_in:int, sr_out:int, quality:str=QUALITY_HIGH) -> np.ndarray:
+    """Reamostra um array inteiro [N, ch] float32."""
+    if sr_in == sr_out:
+        return x
+    rs = make_resampler(sr_in, sr_out, x.shape[1], quality)
+    return np.concatenate([rs.process(x), rs.flush()])
@@ -0,0 +1,67 @@
+import numpy as np
+
+class RingBuffer:
+    """
+    Fila circular de frames float32 [capacidade, ch] com um produtor e um
+    consumidor (ex.: callback do mic -> callback de saída), sem trava: cada lado
+    só escreve o próprio índice (contadores que só crescem) e o publica depois
+    de copiar os dados. No CPython a atribuição de um int é atômica.
+    """
+    __slots__ = ("buf", "capacity", "ch", "_w", "_r", "overruns", "underruns", "dropped", "_gain")
+
+    def __init__(self, capacity:int, ch:int=2):
+        self.buf = np.zeros((capacity, ch), dtype=np.float32)
+        self.capacity = capacity
+        self.ch = ch
+        self._w = 0           # frames já escritos (só o produtor altera)
+        self._r = 0           # frames já lidos (só o consumidor altera)
+        self.overruns = 0     # blocos do produtor que não couberam inteiros
+        self.underruns = 0    # leituras que acharam menos frames que o pedido
+        self.dropped = 0      # frames descartados por falta de espaço
+        self._gain = np.ones((), dtype=np.float32)  # 0-d (ver VoiceTable._n)
+
+    def available(self) -> int:
+        return self._w - self._r
+
+    # ----- produtor -----
+    def write(self, block:np.ndarray):
+        """Copia [n, 1|ch|mais] para a fila (mono é duplicado, canais extras ignorados)."""
+        w = self._w
+        n = block.shape[0]
+        free = self.capacity - (w - self._r)
+        if n > free:
+            self.overruns += 1
+            self.dropped += n - free
+            n = free
+        if n <= 0:
+            return
+        src = block[:n, :self.ch] if block.shape[1] >= self.ch else block[:n, :1]
+        i = w % self.capacity
+        first = min(n, self.capacity - i)
+        np.copyto(self.buf[i:i + first], src[:first])
+        if first < n:
+            np.copyto(self.buf[:n - first], src[first:])
+        self._w = w + n  # publica só depois dos dados
+
+    # ----- consumidor -----
+    def read_into(self, out:np.ndarray, gain:float=1.0) -> int:
+        """Escreve até len(out) frames em `out` (x gain); o resto de `out` fica intocado."""
+        r = self._r
+        frames = out.shape[0]
+        n = min(frames, self._w - r)
+        if n < frames:
+            self.underruns += 1
+        if n <= 0:
+            return 0
+        i = r % self.capacity
+        first = min(n, self.capacity - i)
+        self._gain.fill(gain)
+        np.multiply(self.buf[i:i + first], self._gain, out=out[:first])
+        if first < n:
+            np.multiply(self.buf[:n - first], self._gain, out=out[first:n])
+        self._r = r + n
+        return n
+
+    def stats(self) -> dict:
+        return {"overruns": self.overruns, "underruns": self.underruns,
+                "dropped": self.dropped, "queued": self.available()}
@@ -0,0 +1,4 @@
+import os, sys
+
+# módulos do app ficam na raiz do repositório (layout plano)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,40 @@
+import numpy as np
+from admission import TinyLFU, replay
+
+MB = 1024 * 1024
+
+def _trace(n=20000, pads=200, bed_rate=0.03, seed=0):
+    """Pads curtos com popularidade Zipf(0.9) + trilhas longas tocadas uma vez só."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, pads + 1) ** 0.9
+    weights /= weights.sum()
+    sizes = {f"pad{i}": int(rng.integers(2, 7)) * MB for i in range(pads)}
+    trace = []
+    for i, pick in enumerate(rng.choice(pads, size=n, p=weights)):
+        if rng.random() < bed_rate:
+            key = f"bed{i}"
+            sizes[key] = 150 * MB
+            trace.append(key)
+        else:
+            trace.append(f"pad{pick}")
+    return trace, sizes
+
+def test_tinylfu_beats_plain_lru():
+    trace, sizes = _trace()
+    for budget in (100 * MB, 200 * MB, 400 * MB):
+        lru = replay(trace, sizes, budget, admission=False)
+        tlfu = replay(trace, sizes, budget, admission=True)
+        assert tlfu > lru + 0.05, (budget, lru, tlfu)
+
+def test_replay_matches_lru_without_pressure():
+    trace, sizes = _trace(n=2000, bed_rate=0.0)
+    budget = sum(sizes.values())
+    assert replay(trace, sizes, budget, admission=True) == replay(trace, sizes, budget, admission=False)
+
+def test_admit_rejects_colder_candidate():
+    policy = TinyLFU()
+    for _ in range(5):
+        policy.record("hot")
+    policy.record("cold")
+    assert not policy.admit("cold", ["hot"])
+    assert policy.admit("hot", ["cold"])
@@ -0,0 +1,86 @@
+import sys, types, tracemalloc
+import numpy as np
+import pytest
+
+try:
+    import sounddevice  # noqa: F401
+except Exception:  # sem PortAudio/pacote aqui: o mixer só precisa do módulo para importar
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+import mixer
+
+SR = 48000
+BLOCK = 256
+# pico transitório tolerado por callback: só cabeçalhos de view e ints do Python;
+# um bloco de áudio (2 KB) ou arrays por voz/por bloco passam disso
+ALLOC_LIMIT = 1024
+
+class _Stream:
+    """Stream falso: guarda o callback por device; o teste chama na mão."""
+    def __init__(self, callbacks, device=None, callback=None, **_kw):
+        callbacks[device] = callback
+
+    def start(self): pass
+    def stop(self): pass
+    def close(self): pass
+
+@pytest.fixture
+def streams(monkeypatch):
+    callbacks = {}
+    fake = types.SimpleNamespace(
+        query_devices=lambda *_a, **_k: {"default_samplerate": SR, "max_input_channels": 1},
+        InputStream=lambda **kw: _Stream(callbacks, **kw),
+        OutputStream=lambda **kw: _Stream(callbacks, **kw))
+    monkeypatch.setattr(mixer, "sd", fake)
+    # relógio dos callbacks avança um bloco por volta: a deriva medida fica estável
+    clock = [0.0]
+    monkeypatch.setattr(mixer, "time", types.SimpleNamespace(perf_counter=lambda: clock[0]))
+    return callbacks, clock
+
+def _clips(n, seconds=10.0):
+    rng = np.random.default_rng(0)
+    frames = int(seconds * SR)
+    out = []
+    for k in range(n):
+        x = rng.standard_normal((frames, 2)) * 0.1
+        out.append((x * 32767).astype(np.int16) if k % 2 else x.astype(np.float32))
+    return out
+
+def test_steady_state_callbacks_do_not_allocate(streams):
+    callbacks, clock = streams
+    m = mixer.Mixer(SR, 2, BLOCK)
+    m.set_devices(1, 2, 3)  # mic, saída principal e monitor
+    in_cb, out_cb, mon_cb = callbacks[1], callbacks[2], callbacks[3]
+    for clip in _clips(5):
+        assert m.play_clip(clip, SR)
+    indata = np.random.default_rng(1).standard_normal((BLOCK, 1)).astype(np.float32) * 0.1
+    outdata = np.zeros((BLOCK, 2), dtype=np.float32)
+
+    def cycle(measure=None):
+        clock[0] += BLOCK / SR
+        for name, cb, data in (("in", in_cb, indata), ("main", out_cb, outdata), ("mon", mon_cb, outdata)):
+            if measure is None:
+                cb(data, BLOCK, None, None)
+                continue
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            cb(data, BLOCK, None, None)
+            measure[name] = max(measure[name], tracemalloc.get_traced_memory()[1] - base)
+
+    # aquecimento: fila do mic cheia, views da pilha montadas para os tamanhos do monitor
+    for _ in range(500):
+        cycle()
+    assert m.voice_count() == 5 and m._mic_reader.primed
+    assert np.abs(outdata).max() > 0
+
+    peaks = {"in": 0, "main": 0, "mon": 0}
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(300):
+            cycle(peaks)
+        grown = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    assert max(peaks.values()) < ALLOC_LIMIT, peaks
+    assert grown < ALLOC_LIMIT, grown
+    assert m.voice_count() == 5
@@ -0,0 +1,253 @@
+import itertools
+import numpy as np
+
+# cursores de cada voz: saída principal e monitor
+MAIN = 0
+MON = 1
+
+class Voice:
+    """Parte de uma voz que não é número (o resto mora nos arrays da VoiceTable)."""
+    __slots__ = ("data", "src", "pad", "choke")
+
+    def __init__(self, data, src, pad, choke):
+        self.data = data    # np.ndarray [N, 2] float32|int16 (None em streaming)
+        self.src = src      # StreamingClip | None
+        self.pad = pad
+        self.choke = choke
+
+class VoiceTable:
+    """
+    Vozes em struct-of-arrays: cursores, ganhos e flags em arrays NumPy
+    pré-alocados e slots livres numa free-list, então tocar/remover é O(1) e
+    o avanço dos cursores de todas as vozes é vetorizado.
+    """
+    def __init__(self, capacity:int):
+        self.capacity = capacity
+        self.voices = [None] * capacity
+        self.free = list(range(capacity - 1, -1, -1))  # pop() devolve o menor slot livre
+        self.used = np.zeros(capacity, dtype=bool)
+        self.streaming = set()  # slots cuja fonte ainda cresce (decoder em andamento)
+        self.scale = np.zeros(capacity, dtype=np.float32)      # dtype x ganho da voz
+        self.level = np.full(capacity, np.inf, dtype=np.float32)  # pico do último bloco (roubo)
+        self.order = np.zeros(capacity, dtype=np.int64)       # sequência de início
+        self.start = np.zeros(capacity, dtype=np.int64)       # primeiro frame audível
+        self.avail = np.zeros(capacity, dtype=np.int64)       # fim legível
+        self.final = np.zeros(capacity, dtype=bool)           # avail não cresce mais
+        self.pos = np.zeros((2, capacity), dtype=np.int64)
+        self.stop = np.full((2, capacity), -1, dtype=np.int64)  # fim do fade de saída; -1 = tocando
+        self.done = np.zeros((2, capacity), dtype=bool)
+        self.ended = False      # algum cursor terminou desde a última coleta (ver collect)
+        self._seq = itertools.count()
+        # slots ocupados, compactos (remover troca com o último): o advance percorre
+        # slots[:count] sem procurar na máscara
+        self.count = 0
+        self.slots = np.zeros(capacity, dtype=np.int64)
+        self._index = np.zeros(capacity, dtype=np.int64)   # posição de cada slot em `slots`
+        self._cursors = tuple((self.pos[c], self.stop[c], self.done[c]) for c in (MAIN, MON))
+        # trabalho do advance, por capacidade: o callback só escreve com out= e
+        # nas views [:count], montadas uma vez por contagem de vozes (_work).
+        # No caminho comum nenhum out= é também entrada: com 1 voz o NumPy montaria um iterador
+        self._bufs = {name: np.zeros(capacity, dtype=dtype) for name, dtype in (
+            ("pos", np.int64), ("end", np.int64), ("ramp", np.int64), ("tmp", np.int64), ("lim", np.int64),
+            ("done", bool), ("flag", bool), ("hit", bool),
+            ("gain", np.float32), ("peak", np.float32), ("low", np.float32))}
+        self._views = [None] * (capacity + 1)
+        self._mask = np.zeros(capacity, dtype=bool)  # do collect
+        # escalares dos callbacks como arrays 0-d, reescritos com fill(): um int/float do
+        # Python (ou np.clip) num ufunc vira um array temporário por chamada. O mixer, o
+        # resampler e o ring buffer seguem a mesma regra e apontam para cá.
+        self._n = np.zeros((), dtype=np.int64)
+        self._g = np.zeros((), dtype=np.float32)
+        self._zero = np.zeros((), dtype=np.int64)
+        self._minus1 = np.full(1, -1, dtype=np.int64)
+        # o mixer lê item a item por memoryview: int do Python, sem escalar NumPy nem tolist()
+        self.live = memoryview(self.slots)
+        self.starts = memoryview(self._bufs["pos"])
+        self.ends = memoryview(self._bufs["end"])
+        self.ramps = memoryview(self._bufs["ramp"])
+
+    def add(self, voice:Voice, scale:float) -> int:
+        i = self.free.pop()
+        self.voices[i] = voice
+        self.used[i] = True
+        self.scale[i] = scale
+        self.level[i] = np.inf  # ainda sem bloco: não é a "mais baixa"
+        self.order[i] = next(self._seq)
+        self.pos[:, i] = 0
+        self.stop[:, i] = -1
+        self.done[:, i] = False
+        self.slots[self.count] = i
+        self._index[i] = self.count
+        self.count += 1
+        if voice.src is None:
+            self.start[i], self.avail[i], self.final[i] = 0, voice.data.shape[0], True
+        else:
+            self.start[i], self.avail[i], self.final[i] = 0, 0, False
+            self.streaming.add(i)
+        return i
+
+    def remove(self, i:int):
+        self.voices[i] = None
+        self.used[i] = False
+        self.streaming.discard(i)
+        self.free.append(i)
+        self.count -= 1
+        j, last = int(self._index[i]), int(self.slots[self.count])
+        self.slots[j] = last
+        self._index[last] = j
+
+    def collect(self, both:bool):
+        """Libera os slots cujas vozes terminaram no principal (e no monitor, se `both`)."""
+        if not self.ended:
+            return
+        self.ended = False
+        gone = self._mask
+        np.logical_and(self.used, self.done[MAIN], out=gone)
+        if both:
+            np.logical_and(gone, self.done[MON], out=gone)
+        if np.count_nonzero(gone):
+            for i in np.flatnonzero(gone).tolist():  # só no bloco em que alguma voz acabou
+                self.remove(i)
+        # ainda há cursor terminado esperando o outro stream?
+        np.logical_or(self.done[MAIN], self.done[MON], out=gone)
+        np.logical_and(gone, self.used, out=gone)
+        self.ended = bool(np.count_nonzero(gone))
+
+    def clear(self):
+        self.voices = [None] * self.capacity
+        self.used[:] = False
+        self.streaming.clear()
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.count = 0
+
+    def release(self, i:int, fade:int):
+        """Fade de saída a partir de onde cada cursor está."""
+        if self.stop[MAIN, i] < 0:
+            self.stop[:, i] = self.pos[:, i] + fade
+
+    def playing(self) -> np.ndarray:
+        """Máscara das vozes tocando (sem contar as que estão no fade)."""
+        return self.used & (self.stop[MAIN] < 0)
+
+    def find(self, pad=None, choke=None):
+        """Slots tocando do pad (ou do grupo de corte)."""
+        out = []
+        for i in np.flatnonzero(self.playing()).tolist():
+            v = self.voices[i]
+            if (pad is not None and v.pad == pad) or (choke is not None and v.choke == choke):
+                out.append(i)
+        return out
+
+    def pick(self, mask:np.ndarray, key:np.ndarray) -> int:
+        """Slot com o menor `key` dentro de `mask` (ex.: order = mais antigo)."""
+        return int(np.argmin(np.where(mask, key, np.iinfo(np.int64).max if key.dtype.kind == "i" else np.inf)))
+
+    def refresh_streams(self):
+        # fontes em streaming: ler done antes de start/end/ready
+        if not self.streaming:
+            return
+        for i in tuple(self.streaming):
+            src = self.voices[i].src
+            done = src.done
+            start = src.start
+            if start is None:
+                self.start[i], self.avail[i] = 0, 0
+                continue
+            self.start[i] = start
+            self.avail[i] = src.end if done else src.ready
+            if done:
+                self.final[i] = True
+                self.streaming.discard(i)
+
+    def _work(self, k:int) -> "_Work":
+        w = self._views[k]
+        if w is None:
+            w = self._views[k] = _Work(self.slots[:k], {name: buf[:k] for name, buf in self._bufs.items()})
+        return w
+
+    def advance(self, c:int, frames:int, fade:int) -> int:
+        """
+        Avança o cursor `c` de todas as vozes de uma vez e devolve quantas são:
+        o trecho da j-ésima é live[j], starts[j]:ends[j] (vazio se o cursor já
+        terminou), com ramps[j] = posição na rampa de fade | -1. Não aloca:
+        tudo vai para buffers pré-alocados, válidos até o próximo advance.
+        """
+        k = self.count
+        if not k:
+            return 0
+        pos_c, stop_c, done_c = self._cursors[c]
+        w = self._work(k)
+        slots, pos, end, ramp, tmp, lim = w.slots, w.pos, w.end, w.ramp, w.tmp, w.lim
+        done, flag, hit = w.done, w.flag, w.hit
+        pos_c.take(slots, out=tmp, mode="clip")
+        self.start.take(slots, out=lim, mode="clip")
+        np.maximum(tmp, lim, out=pos)
+        self._n.fill(frames)
+        np.add(pos, self._n, out=tmp)
+        self.avail.take(slots, out=lim, mode="clip")
+        np.minimum(tmp, lim, out=end)
+        np.greater_equal(end, lim, out=hit)
+        self.final.take(slots, out=flag, mode="clip")
+        np.logical_and(hit, flag, out=done)
+        stop_c.take(slots, out=tmp, mode="clip")
+        np.greater_equal(tmp, self._zero, out=flag)
+        if np.count_nonzero(flag):  # caso raro (roubo/choke/restart): só então paga as contas do fade
+            np.minimum(end, tmp, out=ramp)
+            np.putmask(end, flag, ramp)
+            np.maximum(end, pos, out=end)
+            np.greater_equal(end, tmp, out=hit)
+            np.logical_and(hit, flag, out=hit)
+            np.logical_or(done, hit, out=done)
+            np.subtract(tmp, pos, out=ramp)    # rampa = max(fade - (stop - pos), 0); -1 sem fade
+            self._n.fill(fade)
+            np.subtract(self._n, ramp, out=ramp)
+            np.maximum(ramp, self._zero, out=ramp)
+            np.logical_not(flag, out=hit)
+            np.putmask(ramp, hit, self._minus1)
+        else:
+            ramp.fill(-1)
+        # cursor que já terminou (esperando o outro stream): trecho vazio, continua terminado
+        done_c.take(slots, out=flag, mode="clip")
+        if np.count_nonzero(flag):
+            np.putmask(end, flag, pos)
+            np.greater(done, flag, out=hit)  # terminou neste bloco
+            np.logical_or(done, flag, out=done)
+            ended = np.count_nonzero(hit)
+        else:
+            ended = np.count_nonzero(done)
+        pos_c.put(slots, end)
+        if ended:
+            done_c.put(slots, done)
+            self.ended = True
+        return k
+
+    def gains(self, k:int, gain:float) -> np.ndarray:
+        """Ganho (escala da voz x `gain`) de cada uma das k vozes do último advance."""
+        w = self._work(k)
+        self.scale.take(w.slots, out=w.peak, mode="clip")
+        self._g.fill(gain)
+        np.multiply(w.peak, self._g, out=w.gain)
+        return w.gain
+
+    def track_levels(self, k:int, rows:np.ndarray):
+        """Pico (x ganho) de cada voz nas linhas [k, n] mixadas; quem não tocou neste bloco mantém o nível."""
+        w = self._work(k)
+        peak, low = w.peak, w.low
+        np.maximum.reduce(rows, axis=1, out=peak)
+        np.minimum.reduce(rows, axis=1, out=low)
+        np.negative(low, out=low)
+        np.maximum(peak, low, out=peak)
+        np.multiply(peak, w.gain, out=peak)
+        self.level.take(w.slots, out=low, mode="clip")
+        np.less_equal(w.end, w.pos, out=w.hit)
+        np.putmask(peak, w.hit, low)
+        self.level.put(w.slots, peak)
+
+class _Work:
+    """Views [:k] dos buffers de trabalho da VoiceTable (uma por contagem de vozes)."""
+    __slots__ = ("slots", "pos", "end", "ramp", "tmp", "lim", "done", "flag", "hit", "gain", "peak", "low")
+
+    def __init__(self, slots, bufs):
+        self.slots = slots
+        for name, buf in bufs.items():
+            setattr(self, name, buf)
@@ -1,6 +1,39 @@
 from __future__ import annotations
 from PySide6 import QtCore, QtWidgets, QtGui
 import os
+from mixer import PLAY_MODES, MODE_RESTART
+
+# modo de um pad novo (o padrão do mixer, sobrepor, é para quem toca sem pad) e grupos de corte do menu
+DEFAULT_PLAY_MODE = MODE_RESTART
+CHOKE_GROUPS = 4
+
+def pad_menu(owner, tr) -> QtWidgets.QMenu:
+    """Menu de modo de disparo / grupo de corte de um pad (lista e grade); chama owner.set_pad."""
+    menu = QtWidgets.QMenu(owner)
+    modes = QtGui.QActionGroup(menu)
+    for mode in PLAY_MODES:
+        act = menu.addAction(tr.t(f"mode_{mode}"))
+        act.setCheckable(True); act.setChecked(owner.mode == mode); modes.addAction(act)
+        act.triggered.connect(lambda _=False, m=mode: owner.set_pad(m, owner.choke, emit=True))
+    menu.addSeparator()
+    sub = menu.addMenu(tr.t("choke_group"))
+    groups = QtGui.QActionGroup(sub)
+    for g in [None] + list(range(1, CHOKE_GROUPS + 1)):
+        act = sub.addAction(tr.t("choke_none") if g is None else tr.t("choke_n", n=g))
+        act.setCheckable(True); act.setChecked(owner.choke == g); groups.addAction(act)
+        act.triggered.connect(lambda _=False, g=g: owner.set_pad(owner.mode, g, emit=True))
+    return menu
+
+
+def format_duration(seconds: float | None) -> str:
+    """Duração curta para os cards/lista (m:ss, décimos abaixo de 10 s); vazio se desconhecida."""
+    if seconds is None:
+        return ""
+    if seconds < 10:
+        return f"{seconds:.1f}s"
+    m, s = divmod(int(round(seconds)), 60)
+    return f"{m}:{s:02d}"
+
 
 class ElidedLabel(QtWidgets.QLabel):
     def __init__(self, text: str = "", parent=None,
@@ -22,6 +55,43 @@ class ElidedLabel(QtWidgets.QLabel):
         painter.drawText(self.rect(), flags, elided)
 
 
+class WaveformView(QtWidgets.QWidget):
+    """
+    Forma de onda min/max. `provider(width)` devolve [width, 2] ou None
+    (clipe ainda não analisado: desenha só a linha central).
+    """
+    def __init__(self, provider=None, parent=None):
+        super().__init__(parent)
+        self._provider = provider
+        self._peaks = None
+        self.setFixedHeight(28)
+        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+
+    @property
+    def pending(self) -> bool:
+        return self._provider is not None and self._peaks is None
+
+    def resizeEvent(self, e: QtGui.QResizeEvent) -> None:
+        self._peaks = None
+        super().resizeEvent(e)
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
+        w, h = self.width(), self.height()
+        if self._peaks is None and self._provider is not None:
+            self._peaks = self._provider(w)  # O(width), já vem pronto do cache
+        painter = QtGui.QPainter(self)
+        color = QtGui.QColor(139, 92, 246, 170)
+        painter.setPen(color)
+        mid = h / 2.0
+        if self._peaks is None:
+            painter.drawLine(0, int(mid), w, int(mid))
+            return
+        half = mid - 1
+        lines = [QtCore.QLineF(x, mid - float(hi) * half, x, mid - float(lo) * half)
+                 for x, (lo, hi) in enumerate(self._peaks)]
+        painter.drawLines(lines)
+
+
 class HotkeyDialog(QtWidgets.QDialog):
     def __init__(self, tr, current: str = "", parent=None):
         super().__init__(parent)
@@ -67,14 +137,19 @@ class SoundItemWidget(QtWidgets.QWidget):
     removeClicked = QtCore.Signal()
     renameClicked = QtCore.Signal(str)
     hotkeyChanged = QtCore.Signal(str)
+    padChanged = QtCore.Signal(str, object)  # modo de disparo, grupo de corte (None = nenhum)
 
     def __init__(self, tr, path: str, display_name: str | None = None,
-                 hotkey: str | None = None, parent=None):
+                 hotkey: str | None = None, parent=None, duration: float | None = None,
+                 mode: str = DEFAULT_PLAY_MODE, choke: int | None = None):
         super().__init__(parent)
         self.tr = tr
         self.path = path
         self.display_name = display_name or os.path.basename(path)
         self.hotkey = (hotkey or "").strip()
+        self.duration = duration  # segundos (índice da biblioteca) ou None
+        self.mode = mode if mode in PLAY_MODES else DEFAULT_PLAY_MODE
+        self.choke = choke
         self._build_ui()
         self._apply_hotkey_style()
 
@@ -108,16 +183,20 @@ class SoundItemWidget(QtWidgets.QWidget):
         f = self.lblName.font(); f.setPointSizeF(f.pointSizeF() + 1); self.lblName.setFont(f)
         self.lblHotkey = QtWidgets.QLabel(); self.lblHotkey.setObjectName("Badge")
         self.lblHotkey.setStyleSheet("QLabel#Badge { background:#2c2840; color:#eae6ff; border-radius:6px; padding:2px 8px; }")
-        hkrow = QtWidgets.QHBoxLayout(); hkrow.addWidget(self.lblHotkey, 0, QtCore.Qt.AlignLeft); hkrow.addStretch(1)
+        self.lblDuration = QtWidgets.QLabel(); self.lblDuration.setStyleSheet("background: transparent; color:#a9a3c9;")
+        hkrow = QtWidgets.QHBoxLayout(); hkrow.addWidget(self.lblHotkey, 0, QtCore.Qt.AlignLeft)
+        hkrow.addWidget(self.lblDuration, 0, QtCore.Qt.AlignLeft); hkrow.addStretch(1)
         midBox.addWidget(self.lblName); midBox.addLayout(hkrow)
         layout.addLayout(midBox, 1)
 
+        self.btnPad    = QtWidgets.QToolButton(); self._as_icon(self.btnPad,    "⇄", self.tr.t("tip_pad"))
         self.btnHotkey = QtWidgets.QToolButton(); self._as_icon(self.btnHotkey, "⌨", self.tr.t("tip_hotkey"))
         self.btnRename = QtWidgets.QToolButton(); self._as_icon(self.btnRename, "✎", self.tr.t("tip_rename"))
         self.btnClear  = QtWidgets.QToolButton(); self._as_icon(self.btnClear,  "🧹", self.tr.t("tip_clear"))
         self.btnDelete = QtWidgets.QToolButton(); self._as_icon(self.btnDelete, "✖", self.tr.t("tip_delete"))
 
         actions = QtWidgets.QHBoxLayout(); actions.setSpacing(8)
+        actions.addWidget(self.btnPad)
         actions.addWidget(self.btnHotkey); actions.addWidget(self.btnRename)
         actions.addWidget(self.btnClear);  actions.addWidget(self.btnDelete)
         layout.addLayout(actions)
@@ -129,6 +208,7 @@ class SoundItemWidget(QtWidgets.QWidget):
         shadow.setColor(QtGui.QColor(139, 92, 246, 60))
         self.card.setGraphicsEffect(shadow)
 
+        self.btnPad.clicked.connect(self._on_pad)
         self.btnHotkey.clicked.connect(self._on_hotkey)
         self.btnRename.clicked.connect(self._on_rename)
         self.btnClear.clicked.connect(lambda: (self.set_hotkey(""), self.hotkeyChanged.emit("")))
@@ -157,12 +237,25 @@ class SoundItemWidget(QtWidgets.QWidget):
             self.lblHotkey.setText(self.tr.t("no_hotkey"))
             f.setBold(False)
         self.lblName.setFont(f)
+        self.lblDuration.setText(format_duration(self.duration))
+
+    def set_duration(self, seconds: float | None):
+        self.duration = seconds
+        self.lblDuration.setText(format_duration(seconds))
 
     def _apply_hotkey_style(self): self._refresh_labels()
     def set_hotkey(self, hk: str):
         self.hotkey = (hk or "").strip()
         self._apply_hotkey_style()
 
+    def set_pad(self, mode: str, choke: int | None, emit: bool = False):
+        self.mode, self.choke = mode, choke
+        if emit:
+            self.padChanged.emit(mode, choke)
+
+    def _on_pad(self):
+        pad_menu(self, self.tr).exec(self.btnPad.mapToGlobal(QtCore.QPoint(0, self.btnPad.height())))
+
     def _on_hotkey(self):
         dlg = HotkeyDialog(self.tr, self.hotkey, self)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
@@ -187,17 +280,23 @@ class SoundCardWidget(QtWidgets.QFrame):
     removeClicked = QtCore.Signal()
     renameClicked = QtCore.Signal(str)
     hotkeyChanged = QtCore.Signal(str)
+    padChanged = QtCore.Signal(str, object)
 
     # tamanho fixo da grade
     CARD_W = 320
-    CARD_H = 176
+    CARD_H = 212
 
-    def __init__(self, tr, path: str, display_name: str, hotkey: str | None, parent=None):
+    def __init__(self, tr, path: str, display_name: str, hotkey: str | None, parent=None, waveform=None,
+                 duration: float | None = None, mode: str = DEFAULT_PLAY_MODE, choke: int | None = None):
         super().__init__(parent)
         self.tr = tr
         self.path = path
         self.display_name = display_name
         self.hotkey = (hotkey or "").strip()
+        self.duration = duration
+        self.mode = mode
+        self.choke = choke
+        self._waveform = waveform  # callable(width) -> [width, 2] | None
         self._build_ui()
 
     def _build_ui(self):
@@ -217,11 +316,17 @@ class SoundCardWidget(QtWidgets.QFrame):
         self.lblName.setFont(f)
         self.lblHotkey = QtWidgets.QLabel()
         self.lblHotkey.setObjectName("Badge")
+        self.lblDuration = QtWidgets.QLabel(format_duration(self.duration))
+        self.lblDuration.setStyleSheet("background: transparent; color:#a9a3c9;")
 
         nameRow.addWidget(self.lblName, 1)
+        nameRow.addWidget(self.lblDuration, 0, QtCore.Qt.AlignRight)
         nameRow.addWidget(self.lblHotkey, 0, QtCore.Qt.AlignRight)
         v.addLayout(nameRow)
 
+        self.wave = WaveformView(self._waveform)
+        v.addWidget(self.wave)
+
         self.btnPlay = QtWidgets.QPushButton("▶")
         self.btnPlay.setObjectName("BigPlay")
         self.btnPlay.setCursor(QtCore.Qt.PointingHandCursor)
@@ -231,16 +336,20 @@ class SoundCardWidget(QtWidgets.QFrame):
 
         actions = QtWidgets.QHBoxLayout()
         actions.setSpacing(6)
+        self.btnPad    = QtWidgets.QToolButton(); self._as_icon(self.btnPad,    "⇄", self.tr.t("tip_pad"))
         self.btnHotkey = QtWidgets.QToolButton(); self._as_icon(self.btnHotkey, "⌨", self.tr.t("tip_hotkey"))
         self.btnRename = QtWidgets.QToolButton(); self._as_icon(self.btnRename, "✎", self.tr.t("tip_rename"))
         self.btnClear  = QtWidgets.QToolButton(); self._as_icon(self.btnClear,  "🧹", self.tr.t("tip_clear"))
         self.btnDelete = QtWidgets.QToolButton(); self._as_icon(self.btnDelete, "✖", self.tr.t("tip_delete"))
         actions.addStretch(1)
+        actions.addWidget(self.btnPad)
         actions.addWidget(self.btnHotkey); actions.addWidget(self.btnRename)
         actions.addWidget(self.btnClear);  actions.addWidget(self.btnDelete)
         actions.addStretch(1)
         v.addLayout(actions)
 
+        self.btnPad.clicked.connect(lambda: pad_menu(self, self.tr).exec(
+            self.btnPad.mapToGlobal(QtCore.QPoint(0, self.btnPad.height()))))
         self.btnHotkey.clicked.connect(self._on_hotkey)
         self.btnRename.clicked.connect(self._on_rename)
         self.btnClear.clicked.connect(lambda: (self.set_hotkey(""), self.hotkeyChanged.emit("")))
@@ -277,6 +386,11 @@ class SoundCardWidget(QtWidgets.QFrame):
         self.hotkey = (hk or "").strip()
         self._refresh_labels()
 
+    def set_pad(self, mode: str, choke: int | None, emit: bool = False):
+        self.mode, self.choke = mode, choke
+        if emit:
+            self.padChanged.emit(mode, choke)
+
     def _on_hotkey(self):
         dlg = HotkeyDialog(self.tr, self.hotkey, self)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
@@ -342,6 +456,12 @@ class CardsPanel(QtWidgets.QScrollArea):
                 w.setParent(None)
         self._cards.clear()
 
+    def refresh_waveforms(self):
+        """Redesenha só os cards cuja forma de onda ainda não estava pronta."""
+        for c in self._cards:
+            if c.wave.pending:
+                c.wave.update()
+
     def set_cards(self, cards: list[SoundCardWidget]):
         # não recria se for a mesma lista por referência
         if cards is not self._cards: